@@ -9,10 +9,12 @@ import json
 import logging
 import sys
 import asyncio
-from datetime import datetime, time, timedelta
+from time import monotonic
+from collections import OrderedDict
+from datetime import datetime, time, timedelta, timezone
 import re
 from typing import Any, Dict, List, Optional
-import requests
+import httpx
 from telegram.error import TimedOut
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.request import HTTPXRequest
@@ -23,6 +25,7 @@ from telegram.ext import (
 from dotenv import load_dotenv
 from news_utils import NewsFetcher, NewsFilter, NewsFormatter
 from scheduler import DigestScheduler
+from storage import create_user_store
 from telegram.request import HTTPXRequest
 from telegram.error import TimedOut
 
@@ -30,6 +33,41 @@ from telegram.error import TimedOut
 # Загружаем переменные окружения
 load_dotenv()
 
+# Быстрый JSON: orjson -> ujson -> стандартный json.
+# orjson/ujson написаны на C и парсят/сериализуют в разы быстрее stdlib.
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+
+    def _json_dumps_compact(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    try:
+        import ujson
+
+        def _json_loads(data):
+            return ujson.loads(data)
+
+        def _json_dumps(obj) -> bytes:
+            return ujson.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+        def _json_dumps_compact(obj) -> bytes:
+            return ujson.dumps(obj, ensure_ascii=False).encode('utf-8')
+    except ImportError:
+        def _json_loads(data):
+            return json.loads(data)
+
+        def _json_dumps(obj) -> bytes:
+            return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+        def _json_dumps_compact(obj) -> bytes:
+            return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
 def setup_logging():
     level_name = os.getenv("LOG_LEVEL", "INFO").upper()
     level = getattr(logging, level_name, logging.INFO)
@@ -64,9 +102,167 @@ setup_logging()
 # твой модульный логгер — после setup_logging()
 logger = logging.getLogger(__name__)
 
+# Код региона ISO2 в аргументах /news — компилируем один раз, а не на каждый вызов
+_ISO2_RE = re.compile(r"[A-Za-z]{2}")
+
+# Единый формат дат в сообщениях бота
+DATE_FMT = "%d.%m.%Y %H:%M"
+
+# Ссылка в аргументе /save — одна скомпилированная проверка
+# вместо пары startswith по схемам
+_URL_RE = re.compile(r"https?://")
+
+# Время дайджеста ЧЧ:ММ — скомпилированная проверка формата,
+# дешевле полного разбора через datetime.strptime
+_TIME_RE = re.compile(r"(?:[01]\d|2[0-3]):[0-5]\d")
+
+# Адреса и неизменяемые параметры внешних API — собраны один раз,
+# в обработчиках к ним добавляются только переменные поля
+NEWSAPI_TOP_URL = "https://newsapi.org/v2/top-headlines"
+NEWSAPI_EVERYTHING_URL = "https://newsapi.org/v2/everything"
+COINGECKO_PRICE_URL = "https://api.coingecko.com/api/v3/simple/price"
+COINGECKO_PRICE_PARAMS = {
+    "ids": "tether",
+    "vs_currencies": "usd,eur,rub",
+    "include_24hr_change": "true",
+    "include_last_updated_at": "true",
+}
+
+# Человекочитаемые названия частот дайджеста
+FREQ_NAMES = {
+    'daily': 'ежедневно',
+    'weekly': 'еженедельно',
+    'weekdays': 'по будням'
+}
+
+# Общий шаблон данных нового пользователя: ключи и скалярные значения
+# разделяются между записями, копируются только изменяемые списки
+DEFAULT_USER_DATA = {
+    'topics': [],
+    'keywords': [],
+    'digest_enabled': False,
+    'digest_time': '09:00',
+    'digest_frequency': 'daily',
+    'sources': ['rss'],
+    'language': 'ru',
+    'region': 'ru',
+}
+
+
+def _new_user_record() -> Dict[str, Any]:
+    """Новая запись пользователя из общего шаблона."""
+    record = {k: (v.copy() if isinstance(v, list) else v) for k, v in DEFAULT_USER_DATA.items()}
+    record['created_at'] = datetime.now().isoformat()
+    return record
+
+
+# Статические тексты ответов собираем один раз при импорте,
+# а не конкатенацией на каждый вызов команды
+WELCOME_TEXT = (
+    "📰 Добро пожаловать в News Aggregator Bot!\n\n"
+    "Я помогу вам собирать и фильтровать новости по интересующим темам.\n\n"
+    "Основные возможности:\n"
+    "• 📊 Топ новостей за день\n"
+    "• 📧 Ежедневные дайджесты\n"
+    "• 🔍 Фильтрация по ключевым словам\n"
+    "• 🌍 Настройка источников и регионов\n\n"
+    "Используйте /help для просмотра всех команд."
+)
+
+HELP_TEXT = (
+    "<b>🔰 Базовые</b>\n"
+    "• /start — запуск\n"
+    "• /help — помощь\n"
+    "• /about — о боте\n\n"
+
+    "<b>🔎 Поиск и темы</b>\n"
+    "• /news &lt;тема&gt; [ru|us|…] — свежие новости по теме\n"
+    "• /search &lt;слова&gt; — поиск по сохранённым темам\n"
+    "• /topic add|list|remove|rename — управление темами\n"
+    "• /list — показать темы\n"
+    "• /save &lt;N|url&gt; — сохранить материал\n"
+    "• /saved — сохранённые материалы\n\n"
+
+    "<b>📧 Дайджест</b>\n"
+    "• /digest — статус + быстрые кнопки\n"
+    "• /time HH:MM — время отправки (локаль пользователя)\n"
+    "• /freq daily|weekly|weekdays — частота\n\n"
+
+    "<b>⚙️ Настройки</b>\n"
+    "• /sources — выбрать источники (RSS/API/…)\n"
+    "• /lang ru|en|de|… — язык\n"
+    "• /region ru|us|de|… — регион\n\n"
+
+    "<b>💱 Разное</b>\n"
+    "• /crypto_usdt — курс USDT\n\n"
+
+    "<b>Примеры</b>\n"
+    "• /news искусственный интеллект us\n"
+    "• /topic add Машинное обучение\n"
+    "• /time 09:30\n"
+    "• /freq weekdays\n"
+)
+
+ABOUT_TEXT = (
+    "🤖 News Aggregator Bot v1.0\n\n"
+    "Создатель: Daniil Korinenko\n"
+    "Университет: МАГА, 3 семестр\n"
+    "Курс: Основы web-разработки\n\n"
+    "Этот бот собирает новости из различных источников,\n"
+    "фильтрует их по вашим интересам и отправляет\n"
+    "персонализированные дайджесты.\n\n"
+    "Технологии:\n"
+    "• Python 3.8+\n"
+    "• python-telegram-bot\n"
+    "• JSON для хранения данных\n"
+    "• RSS и News API для получения новостей"
+)
+
+TOPIC_USAGE_TEXT = (
+    "🧩 Управление темами\n\n"
+    "Добавить тему:\n"
+    "• /topic <название>\n"
+    "• /topic add <название>\n\n"
+    "Список тем:\n"
+    "• /topic list\n\n"
+    "Удалить тему:\n"
+    "• /topic remove <номер|название>\n\n"
+    "Переименовать тему:\n"
+    "• /topic rename <номер> <новое название>"
+)
+
+NEWS_USAGE_TEXT = (
+    "📰 Как использовать /news:\n"
+    "• /news <запрос> — поиск по теме (язык берётся из настроек, иначе en)\n"
+    "• /news <запрос> <регион-ISO2> — страна новостей, напр.: us, gb, de, ru\n"
+    "Примеры:\n"
+    "  /news искусственный интеллект us\n"
+    "  /news экономика ru\n"
+    "  /news sport\n"
+    "Если в регионе ru пусто, бот попробует другой регион/язык."
+)
+
 class NewsAggregatorBot:
     """Основной класс бота-агрегатора новостей"""
-    
+
+    # Задержка отложенной записи bot_data.json (секунды)
+    SAVE_DEBOUNCE = 2.0
+
+    # Задержка точечной записи пользователя во внешнее хранилище:
+    # серия нажатий кнопок коалесцируется в одну запись
+    PERSIST_DEBOUNCE = 0.2
+
+    # Сроки жизни кэша ответов внешних API (секунды)
+    NEWS_CACHE_TTL = 300
+    CRYPTO_CACHE_TTL = 60
+
+    # Минимальный интервал между исходящими сообщениями
+    # (глобальный лимит Telegram — около 30 сообщений в секунду)
+    SEND_MIN_INTERVAL = 1 / 30
+
+    # Сколько «горячих» пользователей держим в LRU-кэше get_user_data
+    USER_CACHE_MAX = 1024
+
     def __init__(self):
         """Инициализация бота"""
         self.token = os.getenv('TELEGRAM_BOT_TOKEN')
@@ -74,7 +270,28 @@ class NewsAggregatorBot:
             raise ValueError("TELEGRAM_BOT_TOKEN не найден в переменных окружения")
         
         self.data_file = 'bot_data.json'
+        # Опциональное хранилище — Redis (REDIS_URL) или SQLite (USER_DB):
+        # точечные записи вместо read-modify-write всего JSON файла
+        self.store = create_user_store(_json_dumps_compact, _json_loads)
         self.users_data = self.load_data()
+
+        # Состояние отложенной записи: флаг «грязных» данных, таймер
+        # и последний записанный снимок (чтобы не переписывать без изменений)
+        self._data_dirty = False
+        self._save_handle = None
+        self._last_payload: Optional[bytes] = None
+
+        # Отложенные точечные записи во внешнее хранилище: ключ -> таймер
+        self._persist_handles: Dict[str, Any] = {}
+
+        # LRU-вью по int-ключам поверх users_data: те же словари, без
+        # str(user_id)-конверсий на каждый апдейт; размер ограничен,
+        # чтобы кэш не рос вместе с числом пользователей
+        self._users_by_id: 'OrderedDict[int, Dict[str, Any]]' = OrderedDict()
+
+        # Кэш множеств «темы в нижнем регистре» по пользователям —
+        # проверка дубликатов за O(1) вместо прохода по списку
+        self._topics_lc: Dict[int, set] = {}
         
         # Инициализация утилит для работы с новостями
         self.news_fetcher = NewsFetcher()
@@ -83,16 +300,111 @@ class NewsAggregatorBot:
         
         # Инициализация планировщика
         self.scheduler = DigestScheduler(self)
+
+        # Event loop бота; заполняется в _post_init — планировщик шлёт
+        # в него дайджесты из своего потока
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
         
         # Поддерживаемые языки и регионы
         self.supported_languages = ['ru', 'en', 'de', 'fr', 'es']
         self.supported_regions = ['ru', 'us', 'de', 'fr', 'gb', 'ua']
-        
+
+        # Статичные inline-клавиатуры: callback_data не зависит от
+        # пользователя, поэтому разметка собирается один раз при старте
+        self._freq_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("📅 Ежедневно", callback_data="freq|daily")],
+            [InlineKeyboardButton("📆 Еженедельно", callback_data="freq|weekly")],
+            [InlineKeyboardButton("💼 По будням", callback_data="freq|weekdays")]
+        ])
+        self._lang_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton(f"🌐 {lang.upper()}", callback_data=f"set_lang|{lang}")]
+            for lang in self.supported_languages
+        ])
+        region_names = {
+            'ru': '🇷🇺 Россия',
+            'us': '🇺🇸 США',
+            'de': '🇩🇪 Германия',
+            'fr': '🇫🇷 Франция',
+            'gb': '🇬🇧 Великобритания',
+            'ua': '🇺🇦 Украина'
+        }
+        self._region_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton(region_names.get(region, region.upper()), callback_data=f"set_region|{region}")]
+            for region in self.supported_regions
+        ])
+        self._time_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton(t, callback_data=f"set_time|{t}")]
+            for t in ("08:00", "09:00", "18:00", "20:00")
+        ])
+
+        # Общий асинхронный HTTP-клиент (NewsAPI, CoinGecko) — работает
+        # прямо в event loop'е бота, без потоков-исполнителей
+        self._http = httpx.AsyncClient(timeout=10)
+
+        # Ключ NewsAPI читаем один раз; об отсутствии предупреждаем
+        # здесь, а не в логе на каждый вызов /news
+        self.newsapi_key = os.getenv('NEWSAPI_KEY')
+        if not self.newsapi_key:
+            logger.warning("[newsapi] NEWSAPI_KEY отсутствует — /news будет возвращать пустой результат")
+
+        # TTL-кэш ответов внешних API: ключ -> (истекает, значение)
+        self._api_cache: Dict[Any, Any] = {}
+
+        # «Полёты» fetch_news: одинаковые одновременные запросы
+        # коалесцируются в одну общую задачу (single-flight)
+        self._inflight: Dict[Any, asyncio.Task] = {}
+
+        # Rate-limiter исходящих сообщений: лок сериализует отправителей,
+        # интервал выдерживается по монотонным часам
+        self._send_lock = asyncio.Lock()
+        self._last_send = 0.0
+
+        # Таблица диспетчеризации inline-кнопок: действие -> обработчик.
+        # Формат callback_data: "<действие>" или "<действие>|<аргумент>"
+        self._callbacks = {
+            'toggle_digest': self._cb_toggle_digest,
+            'freq': self._cb_set_freq,
+            'toggle_source': self._cb_toggle_source,
+            'set_lang': self._cb_set_lang,
+            'set_region': self._cb_set_region,
+            'open_time': self._cb_open_time,
+            'set_time': self._cb_set_time,
+            'open_freq': self._cb_open_freq,
+            'save': self._cb_save,
+        }
+
+    async def _throttle_send(self) -> None:
+        """Выдерживает SEND_MIN_INTERVAL между исходящими сообщениями,
+        чтобы пачка дайджестов/ответов не упёрлась в флуд-лимит Telegram."""
+        async with self._send_lock:
+            now = monotonic()
+            wait = self._last_send + self.SEND_MIN_INTERVAL - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+                now = monotonic()
+            self._last_send = now
+
+    def _cache_get(self, key):
+        """Достать значение из TTL-кэша (None, если нет или протухло)."""
+        entry = self._api_cache.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if monotonic() > expires:
+            del self._api_cache[key]
+            return None
+        return value
+
+    def _cache_put(self, key, value, ttl: float) -> None:
+        """Положить значение в TTL-кэш."""
+        self._api_cache[key] = (monotonic() + ttl, value)
+
     async def _safe_reply(self, update: Update, text: str, **kwargs):
         """Безопасная отправка сообщения с повторами при таймаутах."""
         msg = update.effective_message
         if msg is None:
             return None
+        await self._throttle_send()
         for attempt in range(3):
             try:
                 return await msg.reply_text(text, **kwargs)
@@ -105,18 +417,21 @@ class NewsAggregatorBot:
             logger.warning(f"Не удалось отправить сообщение после повторов: {e}")
             return None
 
-    def _fetch_newsapi_smart_sync(self, user_data: Dict[str, Any], query: str, region: Optional[str]) -> list:
+    async def _fetch_newsapi_smart(self, user_data: Dict[str, Any], query: str, region: Optional[str]) -> list:
         """Умный поиск NewsAPI: пробуем top-headlines по стране, затем everything по языку, затем фолбэк на us/en.
         Соответствует доке: language не используется в top-headlines, язык только для everything.
+        Все запросы асинхронные; для региона top-headlines и everything уходят параллельно.
+        Непустые результаты мемоизируются на NEWS_CACHE_TTL секунд.
         """
-        import os, requests
-
-        api_key = os.getenv("NEWSAPI_KEY")
-        if not api_key:
-            logger.error("[newsapi] NEWSAPI_KEY отсутствует")
+        if not self.newsapi_key:
             return []
 
-        headers = {"X-Api-Key": api_key}
+        cache_key = ('news', query, region, (user_data.get('language') or '').lower())
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        headers = {"X-Api-Key": self.newsapi_key}
 
         # Разрешённые языки NewsAPI для /v2/everything
         allowed_lang = {"ar","de","en","es","fr","he","it","nl","no","pt","ru","sv","ud","zh"}
@@ -134,82 +449,84 @@ class NewsAggregatorBot:
         if user_lang not in allowed_lang:
             user_lang = "en"
 
-        def call_top(country: str) -> list:
-            url = "https://newsapi.org/v2/top-headlines"
+        async def call_top(country: str) -> list:
             params = {"country": country, "pageSize": 5}
             if query:
                 params["q"] = query
             try:
-                r = requests.get(url, params=params, headers=headers, timeout=10)
+                r = await self._http.get(NEWSAPI_TOP_URL, params=params, headers=headers)
                 j = {}
                 try:
-                    j = r.json()
+                    j = _json_loads(r.content)
                 except Exception:
                     pass
                 logger.info("[newsapi] top %s -> %s; total=%s", country, r.status_code, j.get("totalResults"))
                 if r.status_code == 429:
                     logger.error("[newsapi] rate-limit on top-headlines")
                     return []
-                if r.ok and j.get("status") == "ok":
+                if r.is_success and j.get("status") == "ok":
                     return j.get("articles") or []
             except Exception as e:
                 logger.error("[newsapi] top exception: %s", e)
             return []
 
-        def call_everything(lang: str) -> list:
+        async def call_everything(lang: str) -> list:
             if lang not in allowed_lang:
                 lang = "en"
-            url = "https://newsapi.org/v2/everything"
             params = {"language": lang, "pageSize": 5, "q": query}
             try:
-                r = requests.get(url, params=params, headers=headers, timeout=10)
+                r = await self._http.get(NEWSAPI_EVERYTHING_URL, params=params, headers=headers)
                 j = {}
                 try:
-                    j = r.json()
+                    j = _json_loads(r.content)
                 except Exception:
                     pass
                 logger.info("[newsapi] everything %s -> %s; total=%s", lang, r.status_code, j.get("totalResults"))
                 if r.status_code == 429:
                     logger.error("[newsapi] rate-limit on everything")
                     return []
-                if r.ok and j.get("status") == "ok":
+                if r.is_success and j.get("status") == "ok":
                     return j.get("articles") or []
             except Exception as e:
                 logger.error("[newsapi] everything exception: %s", e)
             return []
 
-        # --- Логика выбора ---
-        # Если указан регион: пробуем top-headlines по стране, затем everything по языку региона,
-        # затем запасные us/en
-        if region and len(region) == 2:
-            reg = region.lower()
-            arts = call_top(reg)
+        async def pick() -> list:
+            # --- Логика выбора ---
+            # Если указан регион: top-headlines по стране и everything по языку региона
+            # запускаем параллельно, предпочитаем top; затем запасные us/en
+            if region and len(region) == 2:
+                reg = region.lower()
+                lang = region_lang.get(reg, user_lang)
+                top_arts, every_arts = await asyncio.gather(call_top(reg), call_everything(lang))
+                if top_arts:
+                    return top_arts
+                if every_arts:
+                    return every_arts
+
+                if reg != "us":
+                    arts = await call_top("us")
+                    if arts:
+                        return arts
+                if lang != "en":
+                    arts = await call_everything("en")
+                    if arts:
+                        return arts
+                return []
+
+            # Регион не указан: сначала everything по языку пользователя (или en), затем запасные
+            arts = await call_everything(user_lang)
             if arts:
                 return arts
-
-            lang = region_lang.get(reg, user_lang)
-            arts = call_everything(lang)
+            arts = await call_everything("en")
             if arts:
                 return arts
+            return await call_top("us")
 
-            if reg != "us":
-                arts = call_top("us")
-                if arts:
-                    return arts
-            if lang != "en":
-                arts = call_everything("en")
-                if arts:
-                    return arts
-            return []
-
-        # Регион не указан: сначала everything по языку пользователя (или en), затем запасные
-        arts = call_everything(user_lang)
-        if arts:
-            return arts
-        arts = call_everything("en")
-        if arts:
-            return arts
-        return call_top("us")
+        articles = await pick()
+        if articles:
+            self._cache_put(cache_key, articles, self.NEWS_CACHE_TTL)
+        return articles
 
     
     async def error_handler(self, update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -222,45 +539,176 @@ class NewsAggregatorBot:
 
     
     def load_data(self) -> Dict[str, Any]:
-        """Загрузка данных пользователей из JSON файла"""
+        """Загрузка данных пользователей (Redis/SQLite или JSON файл)"""
         try:
+            file_data = {}
             if os.path.exists(self.data_file):
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {}
+                with open(self.data_file, 'rb') as f:
+                    file_data = _json_loads(f.read())
+            if self.store is not None:
+                data = self.store.load_all()
+                if not data and file_data:
+                    # Первый запуск с внешним хранилищем — переносим данные из JSON файла
+                    self.store.save_all(file_data)
+                    data = file_data
+                return data
+            return file_data
         except Exception as e:
             logger.error(f"Ошибка загрузки данных: {e}")
             return {}
     
     def save_data(self) -> None:
-        """Сохранение данных пользователей в JSON файл"""
+        """Отложенное сохранение данных пользователей.
+
+        Частые подряд изменения (кнопки, серия команд) коалесцируются
+        в одну запись файла через SAVE_DEBOUNCE секунд вместо записи
+        на каждый апдейт.
+        """
+        self._data_dirty = True
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.users_data, f, ensure_ascii=False, indent=2)
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Вне event loop'а (например, при старте) пишем сразу
+            self.flush_data()
+            return
+        if self._save_handle is None:
+            self._save_handle = loop.call_later(self.SAVE_DEBOUNCE, self.flush_data)
+
+    def flush_data(self) -> None:
+        """Запись данных пользователей в JSON файл.
+
+        Сериализуем сразу (консистентный снимок), а сам дисковый I/O
+        внутри event loop'а уводим в executor, чтобы не блокировать цикл.
+        """
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if not self._data_dirty:
+            return
+        self._data_dirty = False
+        try:
+            payload = _json_dumps(self.users_data)
+        except Exception as e:
+            logger.error(f"Ошибка сериализации данных: {e}")
+            return
+        if payload == self._last_payload:
+            # На диске уже актуальный снимок
+            return
+        self._last_payload = payload
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_data_file(payload)
+            return
+        loop.run_in_executor(None, self._write_data_file, payload)
+
+    def _write_data_file(self, payload: bytes) -> None:
+        """Блокирующая запись файла данных (вызывается вне event loop'а).
+
+        Пишем во временный файл и атомарно подменяем — при падении
+        посреди записи старый bot_data.json остаётся целым.
+        """
+        tmp_file = self.data_file + '.tmp'
+        try:
+            with open(tmp_file, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_file, self.data_file)
         except Exception as e:
             logger.error(f"Ошибка сохранения данных: {e}")
     
     def get_user_data(self, user_id: int) -> Dict[str, Any]:
         """Получение данных пользователя"""
-        if str(user_id) not in self.users_data:
-            self.users_data[str(user_id)] = {
-                'topics': [],
-                'keywords': [],
-                'digest_enabled': False,
-                'digest_time': '09:00',
-                'digest_frequency': 'daily',
-                'sources': ['rss'],
-                'language': 'ru',
-                'region': 'ru',
-                'created_at': datetime.now().isoformat()
-            }
+        user_data = self._users_by_id.get(user_id)
+        if user_data is not None:
+            self._users_by_id.move_to_end(user_id)
+            return user_data
+        key = str(user_id)
+        user_data = self.users_data.get(key)
+        if user_data is None:
+            user_data = self.users_data.setdefault(key, _new_user_record())
+            self._persist_user(key, user_data)
+        self._users_by_id[user_id] = user_data
+        if len(self._users_by_id) > self.USER_CACHE_MAX:
+            evicted_id, _ = self._users_by_id.popitem(last=False)
+            self._topics_lc.pop(evicted_id, None)
+        return user_data
+
+    def _persist_user(self, key: str, user_data: Dict[str, Any]) -> None:
+        """Сохранение одного пользователя.
+
+        С внешним хранилищем — отложенная точечная запись его записи:
+        несколько изменений подряд (серия кнопок) коалесцируются в один
+        save_user; без хранилища — отложенная запись всего JSON файла.
+        """
+        if self.store is None:
             self.save_data()
-        return self.users_data[str(user_id)]
-    
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Вне event loop'а (старт, поток планировщика) пишем сразу
+            self._flush_user(key)
+            return
+        handle = self._persist_handles.get(key)
+        if handle is not None:
+            handle.cancel()
+        self._persist_handles[key] = loop.call_later(self.PERSIST_DEBOUNCE, self._flush_user, key)
+
+    def _flush_user(self, key: str) -> None:
+        """Фактическая запись пользователя во внешнее хранилище."""
+        handle = self._persist_handles.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+        user_data = self.users_data.get(key)
+        if user_data is None or self.store is None:
+            return
+        try:
+            self.store.save_user(key, user_data)
+        except Exception as e:
+            logger.error(f"Ошибка записи в хранилище: {e}")
+            self.save_data()
+
+    def _topics_lower(self, user_id: int) -> set:
+        """Множество названий тем пользователя в нижнем регистре (кэшируется)."""
+        cached = self._topics_lc.get(user_id)
+        if cached is None:
+            topics = self.get_user_data(user_id).get('topics', [])
+            cached = {t.lower() for t in topics}
+            self._topics_lc[user_id] = cached
+        return cached
+
+    def _remember_last_news(self, user_id: int, items: List[Dict[str, Any]]) -> None:
+        """Запоминает последнюю выдачу пользователя в его данных.
+
+        Храним компактные записи (title/url/date/source) вместо полных
+        статей — меньше места в bot_data.json, и /save N работает даже
+        после рестарта бота, в отличие от context.user_data.
+        """
+        compact = []
+        for it in items:
+            src = it.get('source') or ''
+            if isinstance(src, dict):  # формат NewsAPI: {"name": ...}
+                src = src.get('name') or ''
+            compact.append({
+                'title': it.get('title') or '',
+                'url': it.get('url') or '',
+                'date': it.get('date') or it.get('publishedAt') or '',
+                'source': src,
+            })
+        self.update_user_data(user_id, {'last_news': compact})
+
+    def _get_last_news(self, user_id: int) -> List[Dict[str, Any]]:
+        """Последняя выдача пользователя (для /save N и кнопок сохранения)."""
+        return self.get_user_data(user_id).get('last_news', [])
+
     def update_user_data(self, user_id: int, data: Dict[str, Any]) -> None:
         """Обновление данных пользователя"""
-        self.users_data[str(user_id)].update(data)
-        self.save_data()
+        user_data = self.get_user_data(user_id)
+        user_data.update(data)
+        if 'topics' in data:
+            # Список тем изменился — инвалидируем кэш нижнего регистра
+            self._topics_lc.pop(user_id, None)
+        self._persist_user(str(user_id), user_data)
         
         # Обновляем расписание дайджеста если изменились настройки
         if any(key in data for key in ['digest_enabled', 'digest_time', 'digest_frequency']):
@@ -272,54 +720,10 @@ class NewsAggregatorBot:
         user_id = update.effective_user.id
         user_data = self.get_user_data(user_id)
         
-        welcome_message = (
-            "📰 Добро пожаловать в News Aggregator Bot!\n\n"
-            "Я помогу вам собирать и фильтровать новости по интересующим темам.\n\n"
-            "Основные возможности:\n"
-            "• 📊 Топ новостей за день\n"
-            "• 📧 Ежедневные дайджесты\n"
-            "• 🔍 Фильтрация по ключевым словам\n"
-            "• 🌍 Настройка источников и регионов\n\n"
-            "Используйте /help для просмотра всех команд."
-        )
-        
-        await self._safe_reply(update,welcome_message)
-    
+        await self._safe_reply(update, WELCOME_TEXT)
+
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        text = (
-            "<b>🔰 Базовые</b>\n"
-            "• /start — запуск\n"
-            "• /help — помощь\n"
-            "• /about — о боте\n\n"
-
-            "<b>🔎 Поиск и темы</b>\n"
-            "• /news &lt;тема&gt; [ru|us|…] — свежие новости по теме\n"
-            "• /search &lt;слова&gt; — поиск по сохранённым темам\n"
-            "• /topic add|list|remove|rename — управление темами\n"
-            "• /list — показать темы\n"
-            "• /save &lt;N|url&gt; — сохранить материал\n"
-            "• /saved — сохранённые материалы\n\n"
-
-            "<b>📧 Дайджест</b>\n"
-            "• /digest — статус + быстрые кнопки\n"
-            "• /time HH:MM — время отправки (локаль пользователя)\n"
-            "• /freq daily|weekly|weekdays — частота\n\n"
-
-            "<b>⚙️ Настройки</b>\n"
-            "• /sources — выбрать источники (RSS/API/…)\n"
-            "• /lang ru|en|de|… — язык\n"
-            "• /region ru|us|de|… — регион\n\n"
-
-            "<b>💱 Разное</b>\n"
-            "• /crypto_usdt — курс USDT\n\n"
-
-            "<b>Примеры</b>\n"
-            "• /news искусственный интеллект us\n"
-            "• /topic add Машинное обучение\n"
-            "• /time 09:30\n"
-            "• /freq weekdays\n"
-        )
-        await self._safe_reply(update, text, parse_mode="HTML")
+        await self._safe_reply(update, HELP_TEXT, parse_mode="HTML")
 
     
     
@@ -327,24 +731,15 @@ class NewsAggregatorBot:
         """Обработчик команды /topic — управление темами (добавление, список, удаление, переименование)."""
         user_id = update.effective_user.id
         user_data = self.get_user_data(user_id)
+        # Один раз достаём список тем — ниже все ветки работают с ним
+        topics = user_data.get("topics", [])
         args = context.args or []
-        
+
         def normalize_name(name: str) -> str:
             return " ".join(name.split()).strip()
         
         async def show_usage():
-            await self._safe_reply(update,
-                "🧩 Управление темами\n\n"
-                "Добавить тему:\n"
-                "• /topic <название>\n"
-                "• /topic add <название>\n\n"
-                "Список тем:\n"
-                "• /topic list\n\n"
-                "Удалить тему:\n"
-                "• /topic remove <номер|название>\n\n"
-                "Переименовать тему:\n"
-                "• /topic rename <номер> <новое название>"
-            )
+            await self._safe_reply(update, TOPIC_USAGE_TEXT)
         
         if not args:
             await show_usage()
@@ -353,7 +748,6 @@ class NewsAggregatorBot:
         sub = args[0].lower()
         
         if sub in ("list", "ls", "show"):
-            topics = user_data.get("topics", [])
             if not topics:
                 await self._safe_reply(update, "Список тем пуст. Добавьте тему: /topic <название>")
                 return
@@ -366,18 +760,20 @@ class NewsAggregatorBot:
                 await self._safe_reply(update, "Укажите номер или название темы. Пример: /topic remove 2")
                 return
             target = " ".join(args[1:])
-            topics = user_data.get("topics", [])
             removed = None
             try:
                 idx = int(target) - 1
                 if 0 <= idx < len(topics):
                     removed = topics.pop(idx)
             except ValueError:
+                # Один проход на построение индекса нижнего регистра
+                # вместо lower() на каждом сравнении
                 norm = target.strip().lower()
-                for i, t in enumerate(topics):
-                    if t.lower() == norm:
-                        removed = topics.pop(i)
-                        break
+                topics_lc = [t.lower() for t in topics]
+                try:
+                    removed = topics.pop(topics_lc.index(norm))
+                except ValueError:
+                    pass
             if removed is None:
                 await self._safe_reply(update, "Тема не найдена.")
                 return
@@ -394,7 +790,6 @@ class NewsAggregatorBot:
             except ValueError:
                 await self._safe_reply(update, "Первый аргумент должен быть номером темы. Пример: /topic rename 1 Генетика")
                 return
-            topics = user_data.get("topics", [])
             if not (0 <= idx < len(topics)):
                 await self._safe_reply(update, "Некорректный номер темы.")
                 return
@@ -402,7 +797,7 @@ class NewsAggregatorBot:
             if not new_name:
                 await self._safe_reply(update, "Новое название темы не может быть пустым.")
                 return
-            if any(t.lower() == new_name.lower() for t in topics):
+            if new_name.lower() in self._topics_lower(user_id):
                 await self._safe_reply(update, "Такая тема уже существует.")
                 return
             old_name = topics[idx]
@@ -419,12 +814,11 @@ class NewsAggregatorBot:
         if not name:
             await self._safe_reply(update, "Укажите название темы. Пример: /topic Машинное обучение")
             return
-        
-        topics = user_data.get("topics", [])
+
         if len(topics) >= 100:
             await self._safe_reply(update, "Достигнут лимит из 100 тем. Удалите лишние: /topic list")
             return
-        if any(t.lower() == name.lower() for t in topics):
+        if name.lower() in self._topics_lower(user_id):
             await self._safe_reply(update, "Такая тема уже есть. Посмотреть список: /topic list")
             return
         
@@ -444,8 +838,14 @@ class NewsAggregatorBot:
             return
         target = " ".join(args)
         # как URL
-        if target.startswith("http://") or target.startswith("https://"):
-            item = {"title": target, "url": target, "date": datetime.now().strftime("%d.%m.%Y %H:%M"), "source": "manual"}
+        if _URL_RE.match(target):
+            # Если ссылка из последней выдачи — берём готовую запись
+            # (title/date/source уже есть), а не собираем заглушку
+            last_news = self._get_last_news(user_id)
+            item = next(
+                (it for it in last_news if it.get("url") == target),
+                {"title": target, "url": target, "date": datetime.now().strftime(DATE_FMT), "source": "manual"},
+            )
             saved.append(item)
             self.update_user_data(user_id, {"saved": saved})
             await self._safe_reply(update, "💾 Сохранено.")
@@ -456,7 +856,7 @@ class NewsAggregatorBot:
         except ValueError:
             await self._safe_reply(update, "Неверный аргумент. Укажи номер новости или URL.")
             return
-        last_news = context.user_data.get("last_news", [])
+        last_news = self._get_last_news(user_id)
         if not (0 <= idx < len(last_news)):
             await self._safe_reply(update, "Нет такой позиции в последней выдаче.")
             return
@@ -493,21 +893,31 @@ class NewsAggregatorBot:
                 # Собираем новости из выбранных источников (без топик-фильтра на этом шаге)
         lang = user_data.get('language', 'ru')
         region = user_data.get('region', 'ru')
-        sources = user_data.get('sources', ['rss'])
+        # Множество вместо списка: проверки членства за O(1)
+        sources = set(user_data.get('sources', ['rss']))
 
         all_news = []
 
+        # Источники опрашиваем параллельно (каждый — блокирующий requests,
+        # поэтому уводим в потоки и ждём все сразу)
+        tasks = []
         if 'rss' in sources:
             # Подними лимит, чтобы /search нашёл больше совпадений
-            all_news.extend(self.news_fetcher.fetch_rss_news(lang, 50))
+            tasks.append(asyncio.to_thread(self.news_fetcher.fetch_rss_news, lang, 50))
 
         if 'api' in sources:
-            all_news.extend(self.news_fetcher.fetch_api_news(lang, region, 50))
-            all_news.extend(self.news_fetcher.fetch_mediastack_news(lang, region, 50))
+            tasks.append(asyncio.to_thread(self.news_fetcher.fetch_api_news, lang, region, 50))
+            tasks.append(asyncio.to_thread(self.news_fetcher.fetch_mediastack_news, lang, region, 50))
+
+        if tasks:
+            for result in await asyncio.gather(*tasks):
+                all_news.extend(result)
 
         # Дедуп перед тематической фильтрацией
         all_news = self.news_filter.remove_duplicates(all_news)
-        logger.info(all_news)
+        # Дамп всего списка — дорогое форматирование, делаем только под DEBUG
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[search] %d новостей после дедупа: %s", len(all_news), all_news)
 
         if not all_news:
             await self._safe_reply(update, "Пока не удалось получить новости из источников.")
@@ -532,7 +942,7 @@ class NewsAggregatorBot:
             await self._safe_reply(update, "🕵️ По твоим темам свежих новостей не найдено.")
             return
         flat = [it for _, lst in groups for it in lst]
-        context.user_data["last_news"] = flat
+        self._remember_last_news(user_id, flat)
         chunks = []
         for topic, lst in groups:
             header = f"🔎 {topic}"
@@ -550,7 +960,7 @@ class NewsAggregatorBot:
     async def crypto_usdt_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Команда /crypto_usdt — получить текущий курс USDT (Tether) из CoinGecko."""
         try:
-            data = await asyncio.get_event_loop().run_in_executor(None, self._fetch_usdt_price_sync)
+            data = await self._fetch_usdt_price()
             if not data:
                 await self._safe_reply(update, "Не удалось получить данные о курсе USDT.")
                 return
@@ -559,7 +969,7 @@ class NewsAggregatorBot:
             rub = data.get("rub")
             chg = data.get("usd_24h_change")
             ts  = data.get("last_updated_at")
-            dt_str = datetime.utcfromtimestamp(ts).strftime("%d.%m.%Y %H:%M") + " UTC" if ts else ""
+            dt_str = datetime.fromtimestamp(ts, tz=timezone.utc).strftime(DATE_FMT) + " UTC" if ts else ""
             chg_str = ""
             if isinstance(chg, (int, float)):
                 sign = "📈" if chg >= 0 else "📉"
@@ -575,27 +985,18 @@ class NewsAggregatorBot:
             logger.exception("Ошибка в /crypto_usdt: %s", e)
             await self._safe_reply(update, "Ошибка при запросе курса USDT.")
     
-    def _fetch_usdt_price_sync(self) -> Optional[dict]:
-        """Синхронный запрос в CoinGecko Simple Price. Возвращает словарь с полями usd/eur/rub и метаданными."""
-        import os, requests
+    async def _fetch_usdt_price(self) -> Optional[dict]:
+        """Асинхронный запрос в CoinGecko Simple Price. Возвращает словарь с полями usd/eur/rub и метаданными.
+        Удачный ответ мемоизируется на CRYPTO_CACHE_TTL секунд."""
+        cached = self._cache_get('usdt')
+        if cached is not None:
+            return cached
         api_key = os.getenv("COINGECKO_API_KEY")  # опционально
-        if api_key:
-            logger.info("API key exists")
-            url = "https://api.coingecko.com/api/v3/simple/price"
-            headers = {"x-cg-demo-api-key": api_key}
-        else:
-            url = "https://api.coingecko.com/api/v3/simple/price"
-            headers = {}
-        params = {
-            "ids": "tether",
-            "vs_currencies": "usd,eur,rub",
-            "include_24hr_change": "true",
-            "include_last_updated_at": "true",
-        }
+        headers = {"x-cg-demo-api-key": api_key} if api_key else {}
         try:
-            resp = requests.get(url, params=params, headers=headers, timeout=10)
+            resp = await self._http.get(COINGECKO_PRICE_URL, params=COINGECKO_PRICE_PARAMS, headers=headers)
             resp.raise_for_status()
-            j = resp.json()
+            j = _json_loads(resp.content)
             t = j.get("tether") or {}
             out = {
                 "usd": t.get("usd"),
@@ -604,6 +1005,7 @@ class NewsAggregatorBot:
                 "usd_24h_change": t.get("usd_24h_change"),
                 "last_updated_at": t.get("last_updated_at"),
             }
+            self._cache_put('usdt', out, self.CRYPTO_CACHE_TTL)
             return out
         except Exception as e:
             logger.error(f"CoinGecko запрос не удался: {e}")
@@ -620,21 +1022,11 @@ class NewsAggregatorBot:
         user_data = self.get_user_data(user_id)
         args = context.args or []
         if not args:
-            hint = (
-                "📰 Как использовать /news:\n"
-                "• /news <запрос> — поиск по теме (язык берётся из настроек, иначе en)\n"
-                "• /news <запрос> <регион-ISO2> — страна новостей, напр.: us, gb, de, ru\n"
-                "Примеры:\n"
-                "  /news искусственный интеллект us\n"
-                "  /news экономика ru\n"
-                "  /news sport\n"
-                "Если в регионе ru пусто, бот попробует другой регион/язык."
-            )
-            await self._safe_reply(update, hint)
+            await self._safe_reply(update, NEWS_USAGE_TEXT)
             return
         # Парсим: если последний токен выглядит как ISO2 — считаем это регионом
         region = None
-        if len(args) >= 2 and re.fullmatch(r"[A-Za-z]{2}", args[-1]):
+        if len(args) >= 2 and _ISO2_RE.fullmatch(args[-1]):
             region = args[-1].lower()
             query = " ".join(args[:-1])
         else:
@@ -643,14 +1035,12 @@ class NewsAggregatorBot:
             await self._safe_reply(update, "Укажи тему поиска: /news <запрос> [<регион-ISO2>]")
             return
         try:
-            articles = await asyncio.get_event_loop().run_in_executor(
-                None, self._fetch_newsapi_smart_sync, user_data, query, region
-            )
+            articles = await self._fetch_newsapi_smart(user_data, query, region)
             if not articles:
                 await self._safe_reply(update, "📰 Ничего не найдено (или сервис недоступен). Попробуй другой регион, например: /news {q} us".format(q=query))
                 return
             # Сохраняем для /save N
-            context.user_data["last_news"] = articles
+            self._remember_last_news(user_id, articles)
             lines = []
             for i, a in enumerate(articles[:5], 1):
                 title = a.get("title") or "(без названия)"
@@ -677,22 +1067,7 @@ class NewsAggregatorBot:
 
     async def about_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Обработчик команды /about"""
-        about_text = (
-            "🤖 News Aggregator Bot v1.0\n\n"
-            "Создатель: Daniil Korinenko\n"
-            "Университет: МАГА, 3 семестр\n"
-            "Курс: Основы web-разработки\n\n"
-            "Этот бот собирает новости из различных источников,\n"
-            "фильтрует их по вашим интересам и отправляет\n"
-            "персонализированные дайджесты.\n\n"
-            "Технологии:\n"
-            "• Python 3.8+\n"
-            "• python-telegram-bot\n"
-            "• JSON для хранения данных\n"
-            "• RSS и News API для получения новостей"
-        )
-        
-        await self._safe_reply(update,about_text)
+        await self._safe_reply(update, ABOUT_TEXT)
     
     async def top_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Обработчик команды /top - показать топ новостей"""
@@ -702,7 +1077,7 @@ class NewsAggregatorBot:
         try:
             # Получаем новости (заглушка для демонстрации)
             news = await self.fetch_news(user_data)
-            context.user_data['last_news'] = news
+            self._remember_last_news(user_id, news)
             
             if not news:
                 await self._safe_reply(update,"📰 Новости не найдены. Попробуйте настроить источники командой /sources")
@@ -721,10 +1096,10 @@ class NewsAggregatorBot:
         user_data = self.get_user_data(user_id)
         status_btn = "✅ Включить" if not user_data['digest_enabled'] else "❌ Выключить"
         keyboard = [
-            [InlineKeyboardButton(status_btn, callback_data=f"toggle_digest_{user_id}")],
+            [InlineKeyboardButton(status_btn, callback_data="toggle_digest")],
             [
-                InlineKeyboardButton("⏰ Время", callback_data=f"open_time_{user_id}"),
-                InlineKeyboardButton("📅 Частота", callback_data=f"open_freq_{user_id}")
+                InlineKeyboardButton("⏰ Время", callback_data="open_time"),
+                InlineKeyboardButton("📅 Частота", callback_data="open_freq")
             ]
         ]
         msg = (
@@ -747,21 +1122,19 @@ class NewsAggregatorBot:
             )
             return
         
-        try:
-            time_str = context.args[0]
-            # Проверяем формат времени
-            time_obj = datetime.strptime(time_str, '%H:%M').time()
-            
-            self.update_user_data(user_id, {'digest_time': time_str})
-            
-            await self._safe_reply(update,
-                f"✅ Время дайджеста установлено на {time_str}"
-            )
-            
-        except ValueError:
+        time_str = context.args[0]
+        # Проверяем формат времени скомпилированным шаблоном
+        if not _TIME_RE.fullmatch(time_str):
             await self._safe_reply(update,
                 "❌ Неверный формат времени. Используйте ЧЧ:ММ (например, 09:30)"
             )
+            return
+
+        self.update_user_data(user_id, {'digest_time': time_str})
+
+        await self._safe_reply(update,
+            f"✅ Время дайджеста установлено на {time_str}"
+        )
     
     async def freq_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Обработчик команды /freq - установка частоты дайджеста"""
@@ -769,16 +1142,9 @@ class NewsAggregatorBot:
         
         if not context.args:
             # Показываем доступные варианты
-            keyboard = [
-                [InlineKeyboardButton("📅 Ежедневно", callback_data=f"freq_daily_{user_id}")],
-                [InlineKeyboardButton("📆 Еженедельно", callback_data=f"freq_weekly_{user_id}")],
-                [InlineKeyboardButton("💼 По будням", callback_data=f"freq_weekdays_{user_id}")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
             await self._safe_reply(update,
                 "📅 Выберите частоту дайджеста:",
-                reply_markup=reply_markup
+                reply_markup=self._freq_markup
             )
             return
         
@@ -792,15 +1158,9 @@ class NewsAggregatorBot:
             return
         
         self.update_user_data(user_id, {'digest_frequency': frequency})
-        
-        freq_names = {
-            'daily': 'ежедневно',
-            'weekly': 'еженедельно', 
-            'weekdays': 'по будням'
-        }
-        
+
         await self._safe_reply(update,
-            f"✅ Частота дайджеста установлена: {freq_names[frequency]}"
+            f"✅ Частота дайджеста установлена: {FREQ_NAMES[frequency]}"
         )
     
     async def sources_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -817,7 +1177,7 @@ class NewsAggregatorBot:
             keyboard.append([
                 InlineKeyboardButton(
                     button_text,
-                    callback_data=f"toggle_source_{source}_{user_id}"
+                    callback_data=f"toggle_source|{source}"
                 )
             ])
         
@@ -830,51 +1190,16 @@ class NewsAggregatorBot:
     
     async def lang_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Обработчик команды /lang - выбор языка новостей"""
-        user_id = update.effective_user.id
-        
-        keyboard = []
-        for lang in self.supported_languages:
-            keyboard.append([
-                InlineKeyboardButton(
-                    f"🌐 {lang.upper()}",
-                    callback_data=f"set_lang_{lang}_{user_id}"
-                )
-            ])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         await self._safe_reply(update,
             "🌐 Выберите язык новостей:",
-            reply_markup=reply_markup
+            reply_markup=self._lang_markup
         )
     
     async def region_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Обработчик команды /region - выбор региона"""
-        user_id = update.effective_user.id
-        
-        keyboard = []
-        region_names = {
-            'ru': '🇷🇺 Россия',
-            'us': '🇺🇸 США', 
-            'de': '🇩🇪 Германия',
-            'fr': '🇫🇷 Франция',
-            'gb': '🇬🇧 Великобритания',
-            'ua': '🇺🇦 Украина'
-        }
-        
-        for region in self.supported_regions:
-            keyboard.append([
-                InlineKeyboardButton(
-                    region_names.get(region, region.upper()),
-                    callback_data=f"set_region_{region}_{user_id}"
-                )
-            ])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         await self._safe_reply(update,
             "🌍 Выберите регион:",
-            reply_markup=reply_markup
+            reply_markup=self._region_markup
         )
     
     async def list_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -889,11 +1214,9 @@ class NewsAggregatorBot:
             )
             return
         
-        message = "📝 Ваши сохраненные темы:\n\n"
-        for i, topic in enumerate(user_data['topics'], 1):
-            message += f"{i}. {topic}\n"
-        
-        await self._safe_reply(update,message)
+        # join вместо += в цикле: одна аллокация итоговой строки
+        body = "\n".join(f"{i}. {topic}" for i, topic in enumerate(user_data['topics'], 1))
+        await self._safe_reply(update, "📝 Ваши сохраненные темы:\n\n" + body)
     
     async def remove_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Обработчик команды /remove - удаление темы"""
@@ -952,9 +1275,10 @@ class NewsAggregatorBot:
         user_data = self.get_user_data(user_id)
         
         message_text = update.message.text.strip()
-        
-        # Добавляем тему в список
-        if message_text not in user_data['topics']:
+
+        # Добавляем тему в список; дубликаты ищем по кэшированному
+        # множеству в нижнем регистре — O(1) и согласовано с /topic add
+        if message_text.lower() not in self._topics_lower(user_id):
             user_data['topics'].append(message_text)
             self.update_user_data(user_id, {'topics': user_data['topics']})
             
@@ -968,141 +1292,156 @@ class NewsAggregatorBot:
             )
     
     async def handle_callback_query(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        """Обработчик callback запросов от inline кнопок"""
+        """Обработчик callback запросов от inline кнопок.
+
+        Вместо цепочки startswith/split — один partition по "|"
+        и поиск обработчика в таблице диспетчеризации.
+        """
         query = update.callback_query
         await query.answer()
-        
-        data = query.data
+
+        action, _, arg = (query.data or '').partition('|')
         user_id = update.effective_user.id
-        
+
+        handler = self._callbacks.get(action)
+        if handler is None:
+            logger.warning("Неизвестный callback: %s", query.data)
+            return
         try:
-            if data.startswith('toggle_digest_'):
-                # Переключение дайджеста
-                user_data = self.get_user_data(user_id)
-                user_data['digest_enabled'] = not user_data['digest_enabled']
-                self.update_user_data(user_id, {'digest_enabled': user_data['digest_enabled']})
-                
-                status = "включен" if user_data['digest_enabled'] else "выключен"
-                await query.edit_message_text(f"📧 Дайджест {status}")
-                
-            elif data.startswith('freq_'):
-                # Установка частоты
-                freq_type = data.split('_')[1]
-                self.update_user_data(user_id, {'digest_frequency': freq_type})
-                
-                freq_names = {
-                    'daily': 'ежедневно',
-                    'weekly': 'еженедельно',
-                    'weekdays': 'по будням'
-                }
-                
-                await query.edit_message_text(
-                    f"✅ Частота дайджеста установлена: {freq_names[freq_type]}"
-                )
-                
-            elif data.startswith('toggle_source_'):
-                # Переключение источника
-                source = data.split('_')[2]
-                user_data = self.get_user_data(user_id)
-                
-                if source in user_data['sources']:
-                    user_data['sources'].remove(source)
-                else:
-                    user_data['sources'].append(source)
-                
-                self.update_user_data(user_id, {'sources': user_data['sources']})
-                
-                await query.edit_message_text(f"📡 Источник {source.upper()} {'включен' if source in user_data['sources'] else 'выключен'}")
-                
-            elif data.startswith('set_lang_'):
-                # Установка языка
-                lang = data.split('_')[2]
-                self.update_user_data(user_id, {'language': lang})
-                await query.edit_message_text(f"🌐 Язык установлен: {lang.upper()}")
-                
-            elif data.startswith('set_region_'):
-                # Установка региона
-                region = data.split('_')[2]
-                self.update_user_data(user_id, {'region': region})
-                await query.edit_message_text(f"🌍 Регион установлен: {region.upper()}")
-
-            elif data.startswith("open_time_"):
-                times = ["08:00", "09:00", "18:00", "20:00"]
-                rows = [[InlineKeyboardButton(t, callback_data=f"set_time_{t}_{user_id}")] for t in times]
-                await query.edit_message_text("⏰ Выберите время для дайджеста:", reply_markup=InlineKeyboardMarkup(rows))
-
-            elif data.startswith("set_time_"):
-                # формат: set_time_HH:MM_userid
-                parts = data.split("_")
-                t = parts[2]
-                self.update_user_data(user_id, {"digest_time": t})
-                await query.edit_message_text(f"✅ Время дайджеста установлено на {t}")
-
-            elif data.startswith("open_freq_"):
-                rows = [
-                    [InlineKeyboardButton("📅 Ежедневно", callback_data=f"freq_daily_{user_id}")],
-                    [InlineKeyboardButton("📆 Еженедельно", callback_data=f"freq_weekly_{user_id}")],
-                    [InlineKeyboardButton("💼 По будням", callback_data=f"freq_weekdays_{user_id}")]
-                ]
-                await query.edit_message_text("📅 Выберите частоту:", reply_markup=InlineKeyboardMarkup(rows))
-
-                
+            await handler(query, user_id, arg)
         except Exception as e:
             logger.error(f"Ошибка обработки callback: {e}")
             await query.edit_message_text("❌ Произошла ошибка при обработке запроса")
-        # Сохранение из inline-кнопки
-        if data.startswith("save|"):
-            url = data.split("|", 1)[1]
-            user_id = query.from_user.id
-            user_data = self.get_user_data(user_id)
-            saved = user_data.get("saved", [])
-            last_list = context.user_data.get("last_news", [])
-            item = next((it for it in last_list if it.get("url")==url), {"title": url, "url": url, "date": datetime.now().strftime("%d.%m.%Y %H:%M"), "source":"unknown"})
-            saved.append(item)
-            self.update_user_data(user_id, {"saved": saved})
-            await query.answer("Сохранено")
-            return
+
+    async def _cb_toggle_digest(self, query, user_id: int, arg: str) -> None:
+        """Кнопка: переключение дайджеста."""
+        user_data = self.get_user_data(user_id)
+        user_data['digest_enabled'] = not user_data['digest_enabled']
+        self.update_user_data(user_id, {'digest_enabled': user_data['digest_enabled']})
+
+        status = "включен" if user_data['digest_enabled'] else "выключен"
+        await query.edit_message_text(f"📧 Дайджест {status}")
+
+    async def _cb_set_freq(self, query, user_id: int, arg: str) -> None:
+        """Кнопка: установка частоты дайджеста."""
+        self.update_user_data(user_id, {'digest_frequency': arg})
+        await query.edit_message_text(
+            f"✅ Частота дайджеста установлена: {FREQ_NAMES[arg]}"
+        )
+
+    async def _cb_toggle_source(self, query, user_id: int, arg: str) -> None:
+        """Кнопка: переключение источника новостей."""
+        user_data = self.get_user_data(user_id)
+
+        if arg in user_data['sources']:
+            user_data['sources'].remove(arg)
+        else:
+            user_data['sources'].append(arg)
+
+        self.update_user_data(user_id, {'sources': user_data['sources']})
+
+        await query.edit_message_text(f"📡 Источник {arg.upper()} {'включен' if arg in user_data['sources'] else 'выключен'}")
+
+    async def _cb_set_lang(self, query, user_id: int, arg: str) -> None:
+        """Кнопка: установка языка."""
+        self.update_user_data(user_id, {'language': arg})
+        await query.edit_message_text(f"🌐 Язык установлен: {arg.upper()}")
+
+    async def _cb_set_region(self, query, user_id: int, arg: str) -> None:
+        """Кнопка: установка региона."""
+        self.update_user_data(user_id, {'region': arg})
+        await query.edit_message_text(f"🌍 Регион установлен: {arg.upper()}")
+
+    async def _cb_open_time(self, query, user_id: int, arg: str) -> None:
+        """Кнопка: меню выбора времени дайджеста."""
+        await query.edit_message_text("⏰ Выберите время для дайджеста:", reply_markup=self._time_markup)
+
+    async def _cb_set_time(self, query, user_id: int, arg: str) -> None:
+        """Кнопка: установка времени дайджеста."""
+        self.update_user_data(user_id, {"digest_time": arg})
+        await query.edit_message_text(f"✅ Время дайджеста установлено на {arg}")
+
+    async def _cb_open_freq(self, query, user_id: int, arg: str) -> None:
+        """Кнопка: меню выбора частоты."""
+        await query.edit_message_text("📅 Выберите частоту:", reply_markup=self._freq_markup)
+
+    async def _cb_save(self, query, user_id: int, arg: str) -> None:
+        """Кнопка: сохранение новости по URL из последней выдачи."""
+        user_data = self.get_user_data(user_id)
+        saved = user_data.get("saved", [])
+        last_list = self._get_last_news(user_id)
+        item = next((it for it in last_list if it.get("url") == arg), {"title": arg, "url": arg, "date": datetime.now().strftime(DATE_FMT), "source": "unknown"})
+        saved.append(item)
+        self.update_user_data(user_id, {"saved": saved})
+        await query.answer("Сохранено")
 
     
     async def fetch_news(self, user_data: Dict[str, Any]) -> List[Dict[str, str]]:
         """Получение новостей из источников"""
         try:
-            all_news = []
             topics = user_data.get('topics', [])
-            print("LOG:: here are topics:", topics)
+            # Ленивое %s-форматирование: аргументы не форматируются,
+            # если уровень DEBUG выключен
+            logger.debug("fetch_news: темы пользователя: %s", topics)
             language = user_data.get('language', 'ru')
             region = user_data.get('region', 'ru')
-            sources = user_data.get('sources', ['rss'])
-            
-            # Получаем новости из разных источников
-            if 'rss' in sources:
-                rss_news = self.news_fetcher.fetch_rss_news(language, 10)
-                all_news.extend(rss_news)
-                print("LOG:: we are here in fetch_news with rss:", topics)
-            
-            if 'api' in sources:
-                api_news = self.news_fetcher.fetch_api_news(language, region, 10)
-                all_news.extend(api_news)
-                
-                mediastack_news = self.news_fetcher.fetch_mediastack_news(language, region, 10)
-                all_news.extend(mediastack_news)
-                print("LOG:: we are here in fetch_news with api:", topics)
-            
-            # Фильтруем по темам если они есть
-            if topics:
-                print("LOG:: we are here in fetch_news with topics:", topics)
-                filtered_news = self.news_fetcher.get_news_by_topics(topics, language, 15)
-                all_news.extend(filtered_news)
-            
-            # Удаляем дубликаты и фильтруем
-            unique_news = self.news_filter.remove_duplicates(all_news)
-            final_news = self.news_filter.filter_news(unique_news)
-            
-            return final_news[:10]  # Возвращаем максимум 10 новостей
-            
+            sources = set(user_data.get('sources', ['rss']))
+
+            # Пользователи с одинаковыми настройками (типично для пачки
+            # дайджестов) получают результат из TTL-кэша без сети
+            cache_key = ('fetch', tuple(topics), language, region, tuple(sorted(sources)))
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+
+            # Single-flight: одинаковые одновременные вызовы ждут одну
+            # общую задачу вместо дублирования запросов к источникам
+            task = self._inflight.get(cache_key)
+            if task is None:
+                task = asyncio.create_task(
+                    self._fetch_news_uncached(cache_key, topics, language, region, sources)
+                )
+                self._inflight[cache_key] = task
+                task.add_done_callback(lambda _t: self._inflight.pop(cache_key, None))
+            return await task
+
         except Exception as e:
             logger.error(f"Ошибка получения новостей: {e}")
             return []
+
+    async def _fetch_news_uncached(self, cache_key, topics: List[str], language: str,
+                                   region: str, sources: set) -> List[Dict[str, str]]:
+        """Фактический сбор новостей из источников (без кэша и коалесинга)."""
+        all_news = []
+
+        # Получаем новости из разных источников параллельно:
+        # каждый блокирующий фетчер уходит в поток, ждём все разом
+        tasks = []
+        if 'rss' in sources:
+            logger.debug("fetch_news: источник rss, темы: %s", topics)
+            tasks.append(asyncio.to_thread(self.news_fetcher.fetch_rss_news, language, 10))
+
+        if 'api' in sources:
+            logger.debug("fetch_news: источник api, темы: %s", topics)
+            tasks.append(asyncio.to_thread(self.news_fetcher.fetch_api_news, language, region, 10))
+            tasks.append(asyncio.to_thread(self.news_fetcher.fetch_mediastack_news, language, region, 10))
+
+        # Фильтруем по темам если они есть
+        if topics:
+            logger.debug("fetch_news: поиск по темам: %s", topics)
+            tasks.append(asyncio.to_thread(self.news_fetcher.get_news_by_topics, topics, language, 15))
+
+        if tasks:
+            for result in await asyncio.gather(*tasks):
+                all_news.extend(result)
+
+        # Удаляем дубликаты и фильтруем одним проходом
+        final_news = self.news_filter.process(all_news)
+
+        final_news = final_news[:10]  # Возвращаем максимум 10 новостей
+        if final_news:
+            self._cache_put(cache_key, final_news, self.NEWS_CACHE_TTL)
+        return final_news
     
     async def send_digest(self, user_id: int) -> None:
         try:
@@ -1113,20 +1452,39 @@ class NewsAggregatorBot:
             news = await self.fetch_news(user_data)
             if not news:
                 # Мягко молчим, чтобы не спамить пустым дайджестом
-                logger.info(f"Дайджест пуст для {user_id}")
+                logger.info("Дайджест пуст для %s", user_id)
                 return
 
             # Тот же формат, что и обычный список новостей
             message = self.news_formatter.format_digest(news)
-            await self.application.bot.send_message(
-                chat_id=user_id,
-                text=message,
-                disable_web_page_preview=False
-            )
-            logger.info(f"Отправлен дайджест пользователю {user_id}: {len(news)} новостей")
+            for attempt in range(3):
+                await self._throttle_send()
+                try:
+                    await self.application.bot.send_message(
+                        chat_id=user_id,
+                        text=message,
+                        disable_web_page_preview=False
+                    )
+                    break
+                except TimedOut:
+                    await asyncio.sleep(2 ** attempt)  # 1с, 2с, 4с
+            else:
+                logger.warning(f"Дайджест пользователю {user_id} не отправлен: таймауты")
+                return
+            logger.info("Отправлен дайджест пользователю %s: %d новостей", user_id, len(news))
         except Exception as e:
             logger.error(f"Ошибка отправки дайджеста: {e}")
 
+    async def send_digests(self, user_ids: List[int]) -> None:
+        """Отправка пачки дайджестов.
+
+        Последовательный проход: rate-limiter в send_digest сам выдерживает
+        паузы, а fetch_news-кэш и single-flight схлопывают одинаковые
+        запросы к источникам внутри пачки.
+        """
+        for user_id in user_ids:
+            await self.send_digest(user_id)
+
     
     
     async def error_handler(self, update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -1138,59 +1496,93 @@ class NewsAggregatorBot:
         logger.exception("Необработанная ошибка бота: %s", err)
 
 
+    async def _post_init(self, application: Application) -> None:
+        """Вызывается PTB после старта event loop'а.
+
+        Запоминаем loop для планировщика и только после этого запускаем
+        его поток — дайджесты отправляются в живой цикл бота.
+        """
+        self.loop = asyncio.get_running_loop()
+        self.scheduler.start_scheduler()
+
     def run(self) -> None:
         """Запуск бота"""
         # Создаем приложение
-        request = HTTPXRequest(connect_timeout=20, read_timeout=20, write_timeout=20, pool_timeout=20)
-        application = Application.builder().token(self.token).request(request).build()
+        request_kwargs = dict(
+            connect_timeout=20, read_timeout=20, write_timeout=20, pool_timeout=20,
+            connection_pool_size=32,  # пул соединений под параллельные отправки
+        )
+        try:
+            # HTTP/2 мультиплексирует запросы к api.telegram.org в одном
+            # соединении; требует extra python-telegram-bot[http2]
+            request = HTTPXRequest(http_version="2", **request_kwargs)
+        except Exception as e:
+            logger.info("HTTP/2 недоступен (%s), используем HTTP/1.1", e)
+            request = HTTPXRequest(**request_kwargs)
+        # concurrent_updates: обработчики выполняются параллельно (с
+        # ограничением PTB по умолчанию), медленный /news не блокирует
+        # остальных пользователей
+        application = (
+            Application.builder()
+            .token(self.token)
+            .request(request)
+            .concurrent_updates(True)
+            .post_init(self._post_init)
+            .build()
+        )
         self.application = application
         application.add_error_handler(self.error_handler)
 
-        # Добавляем обработчики команд
-        application.add_handler(CommandHandler("start", self.start_command))
-        application.add_handler(CommandHandler("help", self.help_command))
-        application.add_handler(CommandHandler("about", self.about_command))
-        application.add_handler(CommandHandler("topic", self.topic_command))
-        application.add_handler(CommandHandler("top", self.top_command))
-        application.add_handler(CommandHandler("digest", self.digest_command))
-        application.add_handler(CommandHandler("time", self.time_command))
-        application.add_handler(CommandHandler("freq", self.freq_command))
-        application.add_handler(CommandHandler("sources", self.sources_command))
-        application.add_handler(CommandHandler("lang", self.lang_command))
-        application.add_handler(CommandHandler("region", self.region_command))
-        application.add_handler(CommandHandler("list", self.list_command))
-        application.add_handler(CommandHandler("remove", self.remove_command))
-        application.add_handler(CommandHandler("rename", self.rename_command))
-        application.add_handler(CommandHandler("crypto_usdt", self.crypto_usdt_command))
-        application.add_handler(CommandHandler("news", self.news_command))
-        application.add_handler(CommandHandler("search", self.search_command))
-        application.add_handler(CommandHandler("saved", self.saved_command))
-        application.add_handler(CommandHandler("save", self.save_command))
+        # Добавляем обработчики команд одним циклом по таблице
+        # (команда, метод) — ссылки на методы привязаны заранее
+        command_handlers = (
+            ("start", self.start_command),
+            ("help", self.help_command),
+            ("about", self.about_command),
+            ("topic", self.topic_command),
+            ("top", self.top_command),
+            ("digest", self.digest_command),
+            ("time", self.time_command),
+            ("freq", self.freq_command),
+            ("sources", self.sources_command),
+            ("lang", self.lang_command),
+            ("region", self.region_command),
+            ("list", self.list_command),
+            ("remove", self.remove_command),
+            ("rename", self.rename_command),
+            ("crypto_usdt", self.crypto_usdt_command),
+            ("news", self.news_command),
+            ("search", self.search_command),
+            ("saved", self.saved_command),
+            ("save", self.save_command),
+        )
+        for command, callback in command_handlers:
+            application.add_handler(CommandHandler(command, callback))
         
         # Добавляем обработчики сообщений и callback запросов
         application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
         application.add_handler(CallbackQueryHandler(self.handle_callback_query))
         
-        # Запускаем планировщик дайджестов
-        self.scheduler.start_scheduler()
+        # Стартовое расписание строим пакетно — один heapify на всех
+        self.scheduler.update_all_schedules()
+
 
-        for uid_str, udata in self.users_data.items():
-            try:
-                self.scheduler.schedule_user_digest(int(uid_str), udata)
-            except Exception as e:
-                logger.warning(f"Не удалось спланировать дайджест {uid_str}: {e}")
-        
         # Запускаем бота
         logger.info("Запуск News Aggregator Bot...")
         try:
-            # Используем простой запуск без дополнительных параметров
-            application.run_polling()
+            # Подписываемся только на нужные типы апдейтов — Telegram не
+            # присылает лишнего (правки сообщений, статусы чатов и т.п.)
+            application.run_polling(allowed_updates=["message", "callback_query"])
         except KeyboardInterrupt:
             logger.info("Получен сигнал остановки...")
         except Exception as e:
             logger.error(f"Ошибка при запуске бота: {e}")
         finally:
             self.scheduler.stop_scheduler()
+            # Добиваем несохранённые изменения
+            for key in list(self._persist_handles):
+                self._flush_user(key)
+            self.flush_data()
             logger.info("Бот остановлен")
 
 
@@ -5,25 +5,128 @@
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
 from typing import List, Dict, Any, Optional
+import gzip
 import json
 import os
+import re
+import time
 from urllib.parse import urljoin, urlparse
 import xml.etree.ElementTree as ET
 
 logger = logging.getLogger(__name__)
 
+# Быстрый JSON — тот же каскад опциональных зависимостей, что и в
+# bot.py: orjson -> ujson -> стандартный json
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    try:
+        import ujson
+        _json_loads = ujson.loads
+
+        def _json_dumps(obj) -> bytes:
+            return ujson.dumps(obj, ensure_ascii=False).encode('utf-8')
+    except ImportError:
+        _json_loads = json.loads
+
+        def _json_dumps(obj) -> bytes:
+            return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+# lxml опционален: C-парсер libxml2 разбирает RSS в разы быстрее
+# стандартного ElementTree; без него работаем через stdlib как раньше
+try:
+    from lxml import etree as _lxml_etree
+
+    def _xml_iterparse(source):
+        """Потоковый разбор XML через libxml2 (API совместим с ElementTree).
+
+        recover=True терпит слегка битые ленты.
+        """
+        return _lxml_etree.iterparse(source, events=('end',), recover=True)
+except ImportError:
+    def _xml_iterparse(source):
+        """Потоковый разбор XML через стандартный ElementTree."""
+        return ET.iterparse(source, events=('end',))
+
+# Namespace'ы RSS/Atom — статичны, собираем словарь один раз на модуль
+_RSS_NAMESPACES = {
+    'rss': 'http://purl.org/rss/1.0/',
+    'atom': 'http://www.w3.org/2005/Atom',
+    'dc': 'http://purl.org/dc/elements/1.1/',
+    'content': 'http://purl.org/rss/1.0/modules/content/'
+}
+
+
+@lru_cache(maxsize=64)
+def _extract_domain(url: str) -> str:
+    """Извлечение домена из URL (кэшируется по URL)"""
+    try:
+        parsed = urlparse(url)
+        domain = parsed.netloc
+        if domain.startswith('www.'):
+            domain = domain[4:]
+        return domain
+    except Exception:
+        return 'Unknown'
+
+
 class NewsFetcher:
     """Класс для получения новостей из различных источников"""
-    
+
+    # Сжатый снимок TTL-кэша на диске — прогрев после рестарта
+    CACHE_FILE = 'news_cache.json.gz'
+
+    # Фиксированный набор атрибутов: без __dict__ на экземпляр
+    __slots__ = ('news_api_key', 'mediastack_api_key', 'http_timeout', 'session', 'rss_feeds',
+                 '_pool', '_cache', 'rss_cache_ttl', 'api_cache_ttl')
+
     def __init__(self):
         """Инициализация с настройками из переменных окружения"""
         self.news_api_key = os.getenv('NEWSAPI_KEY')
         self.mediastack_api_key = os.getenv('MEDIASTACK_API_KEY')
         self.http_timeout = int(os.getenv('HTTP_TIMEOUT', 30))
-        
+
+        # Одна сессия на все запросы: переиспользуем TCP/TLS-соединения
+        # вместо нового handshake'а на каждый вызов requests.get.
+        # Пул расширен под параллельную загрузку лент, ретраи с бэкоффом
+        # сглаживают 429/5xx от лент и API
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+            ),
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['User-Agent'] = 'NewsAggregatorBot/1.0'
+
+        # Пул потоков для параллельной загрузки RSS лент
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='rss')
+
+        # TTL-кэш разобранных результатов: ключ -> (момент записи, список).
+        # Ленты меняются редко — повторные вызовы обходятся без сети.
+        # При старте прогреваем кэш снимком с диска: просроченные записи
+        # отсеются обычной проверкой TTL
+        self._cache: Dict[Any, tuple] = self._load_disk_cache()
+        self.rss_cache_ttl = int(os.getenv('RSS_CACHE_TTL', 300))
+        self.api_cache_ttl = int(os.getenv('API_CACHE_TTL', 600))
+
         # RSS источники
         self.rss_feeds = {
             'ru': [
@@ -41,73 +144,120 @@ class NewsFetcher:
             ]
         }
     
+    def _cached(self, key, ttl: int, producer) -> List[Dict[str, Any]]:
+        """Результат producer() через TTL-кэш.
+
+        Пустой результат (сеть упала, источник молчит) не кэшируем;
+        вместо него отдаём устаревший снимок, если он есть, — лучше
+        старые новости, чем никаких.
+        """
+        entry = self._cache.get(key)
+        # Настенные часы, а не monotonic: метки переживают рестарт
+        now = time.time()
+        if entry is not None and now - entry[0] < ttl:
+            return entry[1]
+        result = producer()
+        if result:
+            self._cache[key] = (now, result)
+            # Снимок на диск пишем из пула — не задерживаем вызывающего
+            self._pool.submit(self._save_disk_cache)
+        elif entry is not None:
+            return entry[1]
+        return result
+
+    def _load_disk_cache(self) -> Dict[Any, tuple]:
+        """Загрузка снимка кэша с диска (gzip + JSON)"""
+        try:
+            if not os.path.exists(self.CACHE_FILE):
+                return {}
+            with gzip.open(self.CACHE_FILE, 'rb') as f:
+                raw = _json_loads(f.read())
+            cache = {tuple(key): (stamp, data) for key, stamp, data in raw}
+            logger.info(f"Кэш новостей прогрет с диска: {len(cache)} записей")
+            return cache
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать кэш новостей: {e}")
+            return {}
+
+    def _save_disk_cache(self) -> None:
+        """Сжатый снимок кэша на диск (атомарно, через временный файл)"""
+        try:
+            raw = [[list(key), stamp, data] for key, (stamp, data) in self._cache.items()]
+            tmp_file = self.CACHE_FILE + '.tmp'
+            with gzip.open(tmp_file, 'wb', compresslevel=3) as f:
+                f.write(_json_dumps(raw))
+            os.replace(tmp_file, self.CACHE_FILE)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить кэш новостей: {e}")
+
     def fetch_rss_news(self, language: str = 'ru', limit: int = 10) -> List[Dict[str, Any]]:
-        """Получение новостей из RSS лент"""
+        """Получение новостей из RSS лент (с TTL-кэшем)"""
+        return self._cached(
+            ('rss', language, limit), self.rss_cache_ttl,
+            lambda: self._fetch_rss_news_uncached(language, limit)
+        )
+
+    def _fetch_rss_news_uncached(self, language: str = 'ru', limit: int = 10) -> List[Dict[str, Any]]:
+        """Фактическая загрузка новостей из RSS лент (без кэша)"""
         news_list = []
-        
+
         try:
             feeds = self.rss_feeds.get(language, self.rss_feeds['ru'])
-            
-            for feed_url in feeds[:3]:  # Ограничиваем количество источников
-                try:
-                    # Получаем RSS ленту
-                    response = requests.get(feed_url, timeout=self.http_timeout)
-                    response.raise_for_status()
-                    
-                    # Парсим XML
-                    root = ET.fromstring(response.content)
-                    
-                    # Определяем namespace для RSS
-                    namespaces = {
-                        'rss': 'http://purl.org/rss/1.0/',
-                        'atom': 'http://www.w3.org/2005/Atom',
-                        'dc': 'http://purl.org/dc/elements/1.1/',
-                        'content': 'http://purl.org/rss/1.0/modules/content/'
-                    }
-                    
-                    # Ищем элементы новостей
-                    items = []
-                    
-                    # Пробуем разные варианты структуры RSS
-                    if root.tag == 'rss':
-                        # Стандартный RSS 2.0
-                        channel = root.find('channel')
-                        if channel is not None:
-                            items = channel.findall('item')
-                    elif root.tag.endswith('feed'):
-                        # Atom feed
-                        items = root.findall('atom:entry', namespaces)
-                    else:
-                        # Пробуем найти элементы напрямую
-                        items = root.findall('.//item') or root.findall('.//entry')
-                    
-                    # Если не нашли через channel, пробуем напрямую
-                    if not items:
-                        items = root.findall('.//item') or root.findall('.//entry')
-                    
-                    # Обрабатываем найденные элементы
-                    items_to_process = min(len(items), max(1, limit // len(feeds)))
-                    
-                    for item in items[:items_to_process]:
-                        try:
-                            news_item = self._parse_rss_item(item, namespaces, feed_url, language)
-                            if news_item:
-                                news_list.append(news_item)
-                        except Exception as e:
-                            logger.error(f"Ошибка парсинга элемента RSS: {e}")
-                            continue
-                            
-                except ET.ParseError as e:
-                    logger.error(f"Ошибка парсинга XML для {feed_url}: {e}")
-                    continue
-                except Exception as e:
-                    logger.error(f"Ошибка получения RSS {feed_url}: {e}")
-                    continue
-                    
+            per_feed_limit = max(1, limit // len(feeds))
+
+            # Ленты качаем параллельно в пуле потоков: суммарное время
+            # ≈ самая медленная лента, а не сумма задержек всех лент
+            futures = [
+                self._pool.submit(self._fetch_feed, feed_url, per_feed_limit, language)
+                for feed_url in feeds[:3]  # Ограничиваем количество источников
+            ]
+            for future in futures:
+                news_list.extend(future.result())
+
         except Exception as e:
             logger.error(f"Ошибка получения RSS новостей: {e}")
-        
+
         return news_list[:limit]
+
+    def _fetch_feed(self, feed_url: str, per_feed_limit: int, language: str) -> List[Dict[str, Any]]:
+        """Загрузка и разбор одной RSS ленты (выполняется в пуле потоков)"""
+        feed_news = []
+        try:
+            # Качаем ленту потоково и разбираем инкрементально: в памяти
+            # держится один <item>/<entry>, а не весь DOM; дойдя до
+            # лимита, обрываем и разбор, и саму загрузку
+            response = self.session.get(feed_url, timeout=self.http_timeout, stream=True)
+            response.raise_for_status()
+            response.raw.decode_content = True  # прозрачно снимаем gzip/deflate
+
+            try:
+                processed = 0
+                for _event, elem in _xml_iterparse(response.raw):
+                    # Новость — это item (RSS 2.0/RDF) или entry (Atom),
+                    # с namespace или без; сравниваем локальное имя тега
+                    tag = elem.tag
+                    if not isinstance(tag, str) or tag.rsplit('}', 1)[-1] not in ('item', 'entry'):
+                        continue
+                    processed += 1
+                    try:
+                        news_item = self._parse_rss_item(elem, _RSS_NAMESPACES, feed_url, language)
+                        if news_item:
+                            feed_news.append(news_item)
+                    except Exception as e:
+                        logger.error(f"Ошибка парсинга элемента RSS: {e}")
+                    # Данные извлечены — освобождаем поддерево элемента
+                    elem.clear()
+                    if processed >= per_feed_limit:
+                        break
+            finally:
+                response.close()
+
+        except ET.ParseError as e:
+            logger.error(f"Ошибка парсинга XML для {feed_url}: {e}")
+        except Exception as e:
+            logger.error(f"Ошибка получения RSS {feed_url}: {e}")
+
+        return feed_news
     
     def _parse_rss_item(self, item: ET.Element, namespaces: Dict[str, str], feed_url: str, language: str) -> Optional[Dict[str, Any]]:
         """Парсинг отдельного элемента RSS"""
@@ -161,7 +311,14 @@ class NewsFetcher:
             return None
     
     def fetch_api_news(self, language: str = 'ru', country: str = 'ru', limit: int = 10) -> List[Dict[str, Any]]:
-        """Получение новостей через News API"""
+        """Получение новостей через News API (с TTL-кэшем)"""
+        return self._cached(
+            ('newsapi', language, country, limit), self.api_cache_ttl,
+            lambda: self._fetch_api_news_uncached(language, country, limit)
+        )
+
+    def _fetch_api_news_uncached(self, language: str = 'ru', country: str = 'ru', limit: int = 10) -> List[Dict[str, Any]]:
+        """Фактическая загрузка новостей через News API (без кэша)"""
         news_list = []
         
         if not self.news_api_key:
@@ -177,10 +334,12 @@ class NewsFetcher:
                 'pageSize': limit
             }
             
-            response = requests.get(url, params=params, timeout=self.http_timeout)
+            response = self.session.get(url, params=params, timeout=self.http_timeout)
             response.raise_for_status()
             
-            data = response.json()
+            # Разбираем тело напрямую быстрым парсером (bytes на входе
+            # экономят и лишний UTF-8 decode внутри response.json)
+            data = _json_loads(response.content)
             
             for article in data.get('articles', []):
                 news_item = {
@@ -199,7 +358,14 @@ class NewsFetcher:
         return news_list
     
     def fetch_mediastack_news(self, language: str = 'ru', countries: str = 'ru', limit: int = 10) -> List[Dict[str, Any]]:
-        """Получение новостей через Mediastack API"""
+        """Получение новостей через Mediastack API (с TTL-кэшем)"""
+        return self._cached(
+            ('mediastack', language, countries, limit), self.api_cache_ttl,
+            lambda: self._fetch_mediastack_news_uncached(language, countries, limit)
+        )
+
+    def _fetch_mediastack_news_uncached(self, language: str = 'ru', countries: str = 'ru', limit: int = 10) -> List[Dict[str, Any]]:
+        """Фактическая загрузка новостей через Mediastack API (без кэша)"""
         news_list = []
         
         if not self.mediastack_api_key:
@@ -215,10 +381,12 @@ class NewsFetcher:
                 'limit': limit
             }
             
-            response = requests.get(url, params=params, timeout=self.http_timeout)
+            response = self.session.get(url, params=params, timeout=self.http_timeout)
             response.raise_for_status()
             
-            data = response.json()
+            # Разбираем тело напрямую быстрым парсером (bytes на входе
+            # экономят и лишний UTF-8 decode внутри response.json)
+            data = _json_loads(response.content)
             
             for article in data.get('data', []):
                 news_item = {
@@ -244,115 +412,207 @@ class NewsFetcher:
         all_news.extend(self.fetch_rss_news(language, limit))
         all_news.extend(self.fetch_api_news(language, 'ru', limit))
         
-        # Фильтруем по темам
+        # Фильтруем по темам: одна альтернация вместо цикла по темам
+        topics_re = _keywords_pattern(tuple(t.lower() for t in topics)) if topics else None
+
         filtered_news = []
         for news in all_news:
-            title_lower = news['title'].lower()
-            description_lower = news.get('description', '').lower()
-            
-            for topic in topics:
-                topic_lower = topic.lower()
-                if (topic_lower in title_lower or 
-                    topic_lower in description_lower):
-                    filtered_news.append(news)
-                    break
-        
+            # Тот же кэш склеенного текста в нижнем регистре, что и в
+            # NewsFilter: новости из TTL-кэша приходят уже с '_text_lc',
+            # lower() не пересчитывается на каждый вызов
+            text = news.get('_text_lc')
+            if text is None:
+                text = f"{news['title']} {news.get('description', '')}".lower()
+                news['_text_lc'] = text
+
+            if topics_re is not None and topics_re.search(text):
+                filtered_news.append(news)
+
         return filtered_news[:limit]
     
+    # Запасные форматы для редких лент (основные случаи разбирает
+    # быстрый путь в _parse_date)
+    _DATE_FORMATS = (
+        '%Y-%m-%dT%H:%M:%SZ',
+        '%Y-%m-%dT%H:%M:%S.%fZ',
+        '%a, %d %b %Y %H:%M:%S %Z',
+        '%Y-%m-%d %H:%M:%S',
+    )
+
     def _parse_date(self, date_str: str) -> str:
         """Парсинг даты в удобный формат"""
         try:
             if not date_str:
                 return datetime.now().strftime('%d.%m.%Y %H:%M')
-            
-            # Пробуем разные форматы
-            formats = [
-                '%Y-%m-%dT%H:%M:%SZ',
-                '%Y-%m-%dT%H:%M:%S.%fZ',
-                '%a, %d %b %Y %H:%M:%S %Z',
-                '%Y-%m-%d %H:%M:%S'
-            ]
-            
-            for fmt in formats:
+
+            # Диспетчеризация по первому символу вместо перебора форматов
+            # через исключения: ISO 8601 (API, Atom) начинается с цифры,
+            # RFC 822 (pubDate в RSS 2.0) — с дня недели. Оба разбираются
+            # специализированными парсерами stdlib за один вызов
+            try:
+                if date_str[0].isdigit():
+                    dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+                else:
+                    dt = parsedate_to_datetime(date_str)
+                return dt.strftime('%d.%m.%Y %H:%M')
+            except (ValueError, TypeError):
+                pass
+
+            # Редкий формат — старый перебор через strptime
+            for fmt in self._DATE_FORMATS:
                 try:
                     dt = datetime.strptime(date_str, fmt)
                     return dt.strftime('%d.%m.%Y %H:%M')
                 except ValueError:
                     continue
-            
+
             return datetime.now().strftime('%d.%m.%Y %H:%M')
-            
+
         except Exception:
             return datetime.now().strftime('%d.%m.%Y %H:%M')
     
-    def _extract_domain(self, url: str) -> str:
-        """Извлечение домена из URL"""
-        try:
-            parsed = urlparse(url)
-            domain = parsed.netloc
-            if domain.startswith('www.'):
-                domain = domain[4:]
-            return domain
-        except Exception:
-            return 'Unknown'
+    # Входной URL — всегда адрес одной из статичных лент, поэтому после
+    # кэширования urlparse выполняется один раз на ленту, а не на новость
+    _extract_domain = staticmethod(_extract_domain)
+
+
+# Всё, что не буква/цифра, при построении отпечатка заголовка
+_TITLE_NORM_RE = re.compile(r'\W+')
+
+
+@lru_cache(maxsize=128)
+def _keywords_pattern(keywords: tuple) -> 're.Pattern':
+    """Один скомпилированный шаблон-альтернация по набору ключевых слов.
+
+    Текст сканируется одним проходом движка re вместо цикла `in` по
+    каждому слову; наборы слов повторяются от вызова к вызову, поэтому
+    готовые шаблоны кэшируются.
+    """
+    return re.compile('|'.join(re.escape(k) for k in keywords))
+
+
+def _title_fingerprint(title: str) -> int:
+    """Целочисленный отпечаток нормализованного заголовка.
+
+    Регистр и пунктуация отбрасываются, пробелы схлопываются — «Title!»
+    и «title» считаются одной новостью; в set хранится компактный int,
+    а не полная строка заголовка.
+    """
+    return hash(_TITLE_NORM_RE.sub(' ', title.casefold()).strip())
 
 
 class NewsFilter:
     """Класс для фильтрации новостей"""
-    
+
+    __slots__ = ('keywords_blacklist', '_blacklist_re')
+
     def __init__(self):
         """Инициализация фильтра"""
         self.keywords_blacklist = [
             'реклама', 'advertisement', 'sponsored', 'промо',
             'акция', 'скидка', 'sale', 'discount'
         ]
+        # Чёрный список неизменен — компилируем альтернацию один раз
+        self._blacklist_re = _keywords_pattern(tuple(self.keywords_blacklist))
     
-    def filter_news(self, news_list: List[Dict[str, Any]], 
+    def filter_news(self, news_list: List[Dict[str, Any]],
                    keywords: List[str] = None,
                    exclude_keywords: List[str] = None) -> List[Dict[str, Any]]:
         """Фильтрация новостей по ключевым словам"""
         filtered_news = []
-        
+
+        # Наборы слов складываем в единые скомпилированные шаблоны:
+        # одна проверка search() на новость вместо цикла по словам
+        keywords_re = _keywords_pattern(tuple(k.lower() for k in keywords)) if keywords else None
+        exclude_re = _keywords_pattern(tuple(k.lower() for k in exclude_keywords)) if exclude_keywords else None
+
         for news in news_list:
-            title_lower = news['title'].lower()
-            description_lower = news.get('description', '').lower()
-            text = f"{title_lower} {description_lower}"
-            
+            # Склеенный текст в нижнем регистре кэшируем прямо на новости:
+            # при повторных фильтрациях (например, по каждой теме в /search)
+            # lower() не пересчитывается
+            text = news.get('_text_lc')
+            if text is None:
+                text = f"{news['title']} {news.get('description', '')}".lower()
+                news['_text_lc'] = text
+
             # Исключаем рекламу
-            if any(keyword in text for keyword in self.keywords_blacklist):
+            if self._blacklist_re.search(text):
                 continue
-            
+
             # Исключаем по ключевым словам
-            if exclude_keywords:
-                if any(keyword.lower() in text for keyword in exclude_keywords):
-                    continue
-            
+            if exclude_re is not None and exclude_re.search(text):
+                continue
+
             # Включаем по ключевым словам
-            if keywords:
-                if any(keyword.lower() in text for keyword in keywords):
-                    filtered_news.append(news)
-            else:
+            if keywords_re is None or keywords_re.search(text):
                 filtered_news.append(news)
-        
+
         return filtered_news
     
+    def process(self, news_list: List[Dict[str, Any]],
+                keywords: List[str] = None,
+                exclude_keywords: List[str] = None) -> List[Dict[str, Any]]:
+        """Дедупликация и фильтрация за один проход.
+
+        Эквивалент remove_duplicates() + filter_news(), но каждая новость
+        обходится один раз — без промежуточного списка между этапами.
+        """
+        keywords_re = _keywords_pattern(tuple(k.lower() for k in keywords)) if keywords else None
+        exclude_re = _keywords_pattern(tuple(k.lower() for k in exclude_keywords)) if exclude_keywords else None
+
+        seen_fp = set()
+        result = []
+
+        # Горячий цикл по всей пачке: выносим поиск атрибутов и методов
+        # из тела цикла в локальные имена
+        seen = seen_fp.__contains__
+        remember = seen_fp.add
+        keep = result.append
+        in_blacklist = self._blacklist_re.search
+        excluded = exclude_re.search if exclude_re is not None else None
+        wanted = keywords_re.search if keywords_re is not None else None
+
+        for news in news_list:
+            fp = _title_fingerprint(news['title'])
+            if seen(fp):
+                continue
+
+            text = news.get('_text_lc')
+            if text is None:
+                text = f"{news['title']} {news.get('description', '')}".lower()
+                news['_text_lc'] = text
+
+            if in_blacklist(text):
+                continue
+            if excluded is not None and excluded(text):
+                continue
+            if wanted is not None and not wanted(text):
+                continue
+
+            remember(fp)
+            keep(news)
+
+        return result
+
     def remove_duplicates(self, news_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Удаление дубликатов новостей"""
-        seen_titles = set()
+        seen_fp = set()
         unique_news = []
-        
+
         for news in news_list:
-            title = news['title'].lower().strip()
-            if title not in seen_titles:
-                seen_titles.add(title)
+            fp = _title_fingerprint(news['title'])
+            if fp not in seen_fp:
+                seen_fp.add(fp)
                 unique_news.append(news)
-        
+
         return unique_news
 
 
 class NewsFormatter:
     """Класс для форматирования новостей"""
-    
+
+    __slots__ = ()
+
     @staticmethod
     def format_news_list(news_list: List[Dict[str, Any]], 
                         max_items: int = 10) -> str:
@@ -360,26 +620,28 @@ class NewsFormatter:
         if not news_list:
             return "📰 Новости не найдены."
         
-        message = f"📰 Найдено новостей: {len(news_list)}\n\n"
-        
+        # Собираем куски в список и склеиваем одним join — линейно по
+        # длине сообщения вместо новой строки на каждую конкатенацию
+        parts = [f"📰 Найдено новостей: {len(news_list)}\n\n"]
+
         for i, news in enumerate(news_list[:max_items], 1):
-            message += f"{i}. {news['title']}\n"
-            
+            parts.append(f"{i}. {news['title']}\n")
+
             if news.get('description'):
                 description = news['description'][:100]
                 if len(news['description']) > 100:
                     description += "..."
-                message += f"   📝 {description}\n"
-            
-            message += f"   📅 {news['date']}\n"
-            message += f"   📡 {news.get('source', 'Unknown')}\n"
-            
+                parts.append(f"   📝 {description}\n")
+
+            parts.append(f"   📅 {news['date']}\n")
+            parts.append(f"   📡 {news.get('source', 'Unknown')}\n")
+
             if news.get('url'):
-                message += f"   🔗 {news['url']}\n"
-            
-            message += "\n"
-        
-        return message
+                parts.append(f"   🔗 {news['url']}\n")
+
+            parts.append("\n")
+
+        return ''.join(parts)
     
     @staticmethod
     def format_digest(news_list: List[Dict[str, Any]], 
@@ -388,12 +650,9 @@ class NewsFormatter:
         if not date:
             date = datetime.now().strftime('%d.%m.%Y')
         
-        message = f"📧 Ваш дайджест за {date}:\n\n"
-        
         if not news_list:
-            message += "📰 Новостей не найдено."
-            return message
-        
+            return f"📧 Ваш дайджест за {date}:\n\n📰 Новостей не найдено."
+
         # Группируем по источникам
         sources = {}
         for news in news_list:
@@ -401,13 +660,14 @@ class NewsFormatter:
             if source not in sources:
                 sources[source] = []
             sources[source].append(news)
-        
+
+        parts = [f"📧 Ваш дайджест за {date}:\n\n"]
         for source, source_news in sources.items():
-            message += f"📡 {source}:\n"
+            parts.append(f"📡 {source}:\n")
             for news in source_news[:3]:  # Максимум 3 новости от источника
-                message += f"• {news['title']}\n"
-            message += "\n"
-        
-        message += "Используйте /top для просмотра полного списка новостей."
-        
-        return message
+                parts.append(f"• {news['title']}\n")
+            parts.append("\n")
+
+        parts.append("Используйте /top для просмотра полного списка новостей.")
+
+        return ''.join(parts)
@@ -5,189 +5,271 @@
 """
 
 import asyncio
-import schedule
+import heapq
 import time
 import logging
-from datetime import datetime, time as dt_time, timedelta
-from typing import Dict, List, Any
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
 import threading
 
 logger = logging.getLogger(__name__)
 
 class DigestScheduler:
-    """Класс для планирования отправки дайджестов"""
-    
+    """Класс для планирования отправки дайджестов.
+
+    Вместо библиотеки schedule с опросом раз в минуту — куча
+    (метка времени, user_id): поток спит ровно до ближайшего срока,
+    и на пользователя приходится одна запись вместо пяти job-объектов
+    в случае weekdays.
+    """
+
+    __slots__ = ('bot', 'running', 'scheduler_thread', '_heap', '_next_ts', '_prepared', '_lock', '_wakeup')
+
     def __init__(self, bot_instance):
         """Инициализация планировщика"""
         self.bot = bot_instance
         self.running = False
         self.scheduler_thread = None
-        
+
+        # Куча (метка времени, user_id). Актуальная метка пользователя —
+        # в _next_ts: записи кучи с другой меткой считаются отменёнными
+        # и отбрасываются при извлечении (отмена без поиска по куче)
+        self._heap: List[tuple] = []
+        self._next_ts: Dict[int, float] = {}
+        # Разобранный «триггер» пользователя (час, минута, частота):
+        # строка HH:MM парсится при регистрации, а не при каждом
+        # перепланировании после срабатывания
+        self._prepared: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
     def start_scheduler(self):
         """Запуск планировщика в отдельном потоке"""
         if self.running:
             logger.warning("Планировщик уже запущен")
             return
-        
+
         self.running = True
         self.scheduler_thread = threading.Thread(target=self._run_scheduler, daemon=True)
         self.scheduler_thread.start()
         logger.info("Планировщик дайджестов запущен")
-    
+
     def stop_scheduler(self):
         """Остановка планировщика"""
         self.running = False
+        self._wakeup.set()
         if self.scheduler_thread:
             self.scheduler_thread.join(timeout=5)
         logger.info("Планировщик дайджестов остановлен")
-    
+
     def _run_scheduler(self):
-        """Основной цикл планировщика"""
+        """Основной цикл: спим до ближайшего дайджеста из кучи"""
         while self.running:
             try:
-                schedule.run_pending()
-                time.sleep(60)  # Проверяем каждую минуту
+                now = time.time()
+                due = []
+                with self._lock:
+                    while self._heap and self._heap[0][0] <= now:
+                        ts, user_id = heapq.heappop(self._heap)
+                        # Метка не совпала — запись устарела после
+                        # смены настроек, пропускаем
+                        if self._next_ts.get(user_id) == ts:
+                            due.append(user_id)
+                    wait = self._heap[0][0] - now if self._heap else 3600.0
+
+                if due:
+                    # Сначала перепланируем всю пачку (следующие сроки не
+                    # зависят от длительности отправки), затем шлём её
+                    # одной корутиной
+                    for user_id in due:
+                        try:
+                            self._reschedule(user_id)
+                        except Exception as e:
+                            logger.error(f"Ошибка перепланирования дайджеста {user_id}: {e}")
+                    self._send_digest_batch(due)
+                    continue  # сроки сдвинулись — пересчитываем
+
+                # Просыпаемся к ближайшему сроку или по сигналу об
+                # изменении расписания
+                self._wakeup.wait(timeout=max(wait, 0.0))
+                self._wakeup.clear()
             except Exception as e:
                 logger.error(f"Ошибка в планировщике: {e}")
                 time.sleep(60)
-    
+
     def schedule_user_digest(self, user_id: int, user_data: Dict[str, Any]):
         """Планирование дайджеста для конкретного пользователя"""
         if not user_data.get('digest_enabled', False):
+            self._remove_user_jobs(user_id)
             return
-        
+
         digest_time = user_data.get('digest_time', '09:00')
         frequency = user_data.get('digest_frequency', 'daily')
-        
+
         try:
-            # Парсим время
+            # Парсим время один раз при регистрации (валидация формата)
             hour, minute = map(int, digest_time.split(':'))
-            digest_time_obj = dt_time(hour, minute)
-            
-            # Удаляем старые задачи для этого пользователя
-            self._remove_user_jobs(user_id)
-            
-            # Добавляем новую задачу в зависимости от частоты
-            if frequency == 'daily':
-                schedule.every().day.at(digest_time).do(
-                    self._send_digest_job, user_id
-                ).tag(f"user_{user_id}")
-            elif frequency == 'weekly':
-                schedule.every().monday.at(digest_time).do(
-                    self._send_digest_job, user_id
-                ).tag(f"user_{user_id}")
-            elif frequency == 'weekdays':
-                schedule.every().monday.at(digest_time).do(
-                    self._send_digest_job, user_id
-                ).tag(f"user_{user_id}")
-                schedule.every().tuesday.at(digest_time).do(
-                    self._send_digest_job, user_id
-                ).tag(f"user_{user_id}")
-                schedule.every().wednesday.at(digest_time).do(
-                    self._send_digest_job, user_id
-                ).tag(f"user_{user_id}")
-                schedule.every().thursday.at(digest_time).do(
-                    self._send_digest_job, user_id
-                ).tag(f"user_{user_id}")
-                schedule.every().friday.at(digest_time).do(
-                    self._send_digest_job, user_id
-                ).tag(f"user_{user_id}")
-            
+            next_dt = self._next_run_dt(frequency, hour, minute)
+            if next_dt is None:
+                logger.error(f"Неизвестная частота дайджеста для пользователя {user_id}: {frequency}")
+                return
+
+            ts = next_dt.timestamp()
+            with self._lock:
+                self._prepared[user_id] = (hour, minute, frequency)
+                self._next_ts[user_id] = ts
+                heapq.heappush(self._heap, (ts, user_id))
+            # Будим цикл: новый срок может оказаться ближайшим
+            self._wakeup.set()
+
             logger.info(f"Запланирован дайджест для пользователя {user_id}: {frequency} в {digest_time}")
-            
+
         except Exception as e:
             logger.error(f"Ошибка планирования дайджеста для пользователя {user_id}: {e}")
-    
+
+    @staticmethod
+    def _next_run_dt(frequency: str, hour: int, minute: int) -> Optional[datetime]:
+        """Ближайший момент дайджеста для частоты и времени HH:MM"""
+        now = datetime.now()
+        candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+        if frequency == 'daily':
+            if candidate <= now:
+                candidate += timedelta(days=1)
+            return candidate
+
+        if frequency == 'weekly':
+            # Понедельник = 0
+            candidate += timedelta(days=(0 - now.weekday()) % 7)
+            if candidate <= now:
+                candidate += timedelta(days=7)
+            return candidate
+
+        if frequency == 'weekdays':
+            while candidate <= now or candidate.weekday() >= 5:
+                candidate += timedelta(days=1)
+            return candidate
+
+        return None
+
+    def _reschedule(self, user_id: int):
+        """Планирование следующего дайджеста по готовому триггеру.
+
+        После срабатывания настройки не перечитываются и время не
+        парсится заново — используется кортеж из _prepared.
+        """
+        prepared = self._prepared.get(user_id)
+        if prepared is None:
+            return
+        hour, minute, frequency = prepared
+        next_dt = self._next_run_dt(frequency, hour, minute)
+        if next_dt is None:
+            return
+        ts = next_dt.timestamp()
+        with self._lock:
+            self._next_ts[user_id] = ts
+            heapq.heappush(self._heap, (ts, user_id))
+
     def _remove_user_jobs(self, user_id: int):
         """Удаление всех задач для конкретного пользователя"""
         try:
-            schedule.clear(f"user_{user_id}")
+            with self._lock:
+                # Запись в куче станет «осиротевшей» и отбросится при
+                # извлечении — кучу не перестраиваем
+                self._next_ts.pop(user_id, None)
+                self._prepared.pop(user_id, None)
         except Exception as e:
             logger.error(f"Ошибка удаления задач для пользователя {user_id}: {e}")
-    
-    def _send_digest_job(self, user_id: int):
-        """Задача отправки дайджеста"""
+
+    def _send_digest_batch(self, user_ids: List[int]):
+        """Отправка дайджестов созревшей пачке пользователей.
+
+        Одна корутина send_digests на всю пачку вместо перекидывания в
+        loop по одному: совпадающие настройки пользователей попадают в
+        общий кэш fetch_news, интервал отправки держит rate-limiter.
+        """
         try:
-            # Создаем новый event loop для асинхронного вызова
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            # Вызываем асинхронный метод отправки дайджеста
-            loop.run_until_complete(self.bot.send_digest(user_id))
-            
-            loop.close()
-            
+            # Отправляем в живой event loop бота вместо создания и
+            # разрушения нового цикла на каждый дайджест — так работает
+            # и общий HTTP-клиент, и rate-limiter отправки
+            loop = self.bot.loop
+            if loop is None or loop.is_closed():
+                logger.warning(f"Event loop бота недоступен — дайджесты {user_ids} пропущены")
+                return
+
+            future = asyncio.run_coroutine_threadsafe(self.bot.send_digests(user_ids), loop)
+            future.result(timeout=60 * len(user_ids))
+
         except Exception as e:
-            logger.error(f"Ошибка отправки дайджеста пользователю {user_id}: {e}")
-    
+            logger.error(f"Ошибка отправки дайджестов {user_ids}: {e}")
+
     def update_all_schedules(self):
-        """Обновление расписания для всех пользователей"""
+        """Обновление расписания для всех пользователей.
+
+        Новое состояние собирается целиком вне лока и подменяется одним
+        присваиванием: один heapify вместо N heappush под локом и одно
+        пробуждение цикла вместо N.
+        """
         try:
-            # Очищаем все задачи
-            schedule.clear()
-            
-            # Планируем дайджесты для всех пользователей
+            heap = []
+            next_ts: Dict[int, float] = {}
+            prepared: Dict[int, tuple] = {}
+
             for user_id_str, user_data in self.bot.users_data.items():
+                if not user_data.get('digest_enabled', False):
+                    continue
                 user_id = int(user_id_str)
-                self.schedule_user_digest(user_id, user_data)
-            
+                digest_time = user_data.get('digest_time', '09:00')
+                frequency = user_data.get('digest_frequency', 'daily')
+                try:
+                    hour, minute = map(int, digest_time.split(':'))
+                    next_dt = self._next_run_dt(frequency, hour, minute)
+                    if next_dt is None:
+                        logger.error(f"Неизвестная частота дайджеста для пользователя {user_id}: {frequency}")
+                        continue
+                except Exception as e:
+                    logger.error(f"Ошибка планирования дайджеста для пользователя {user_id}: {e}")
+                    continue
+
+                ts = next_dt.timestamp()
+                prepared[user_id] = (hour, minute, frequency)
+                next_ts[user_id] = ts
+                heap.append((ts, user_id))
+
+            heapq.heapify(heap)
+
+            with self._lock:
+                self._heap = heap
+                self._next_ts = next_ts
+                self._prepared = prepared
+            self._wakeup.set()
+
             logger.info(f"Обновлено расписание для {len(self.bot.users_data)} пользователей")
-            
+
         except Exception as e:
             logger.error(f"Ошибка обновления расписания: {e}")
-    
+
     def get_next_digest_time(self, user_id: int) -> str:
         """Получение времени следующего дайджеста для пользователя"""
         try:
             user_data = self.bot.get_user_data(user_id)
             if not user_data.get('digest_enabled', False):
                 return "Дайджест отключен"
-            
+
             digest_time = user_data.get('digest_time', '09:00')
             frequency = user_data.get('digest_frequency', 'daily')
-            
-            now = datetime.now()
-            
-            if frequency == 'daily':
-                next_time = now.replace(
-                    hour=int(digest_time.split(':')[0]),
-                    minute=int(digest_time.split(':')[1]),
-                    second=0,
-                    microsecond=0
-                )
-                if next_time <= now:
-                    next_time += timedelta(days=1)
-                    
-            elif frequency == 'weekly':
-                days_ahead = 7 - now.weekday()  # Понедельник = 0
-                if days_ahead == 7:
-                    days_ahead = 0
-                next_time = now + timedelta(days=days_ahead)
-                next_time = next_time.replace(
-                    hour=int(digest_time.split(':')[0]),
-                    minute=int(digest_time.split(':')[1]),
-                    second=0,
-                    microsecond=0
-                )
-                
-            elif frequency == 'weekdays':
-                days_ahead = 1 - now.weekday()  # Следующий рабочий день
-                if days_ahead <= 0:
-                    days_ahead += 5
-                next_time = now + timedelta(days=days_ahead)
-                next_time = next_time.replace(
-                    hour=int(digest_time.split(':')[0]),
-                    minute=int(digest_time.split(':')[1]),
-                    second=0,
-                    microsecond=0
-                )
-            
+
+            hour, minute = map(int, digest_time.split(':'))
+            next_time = self._next_run_dt(frequency, hour, minute)
+            if next_time is None:
+                return "Ошибка расчета"
+
             return next_time.strftime('%d.%m.%Y %H:%M')
-            
+
         except Exception as e:
             logger.error(f"Ошибка расчета времени следующего дайджеста: {e}")
             return "Ошибка расчета"
-    
+
     def get_scheduled_jobs_count(self) -> int:
         """Получение количества запланированных задач"""
-        return len(schedule.jobs)
+        return len(self._next_ts)
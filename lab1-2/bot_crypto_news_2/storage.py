@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Хранилище данных пользователей
+Опциональные бэкенды вместо перезаписи всего bot_data.json на каждое
+изменение настроек: Redis (REDIS_URL) или SQLite (USER_DB) — в обоих
+случаях пишется только запись изменённого пользователя
+"""
+
+import logging
+import os
+import sqlite3
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# redis-py опционален: без него (или без REDIS_URL) бот работает по-старому с JSON файлом
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class RedisUserStore:
+    """Данные пользователей в Redis-хэше.
+
+    Каждый пользователь — отдельное поле хэша, поэтому обновление
+    настроек пишет только его запись, а не весь массив данных.
+    """
+
+    HASH_KEY = 'bot:users'
+
+    __slots__ = ('_dumps', '_loads', '_redis')
+
+    def __init__(self, url: str, dumps, loads):
+        """Подключение к Redis; dumps/loads — (де)сериализаторы JSON."""
+        self._dumps = dumps
+        self._loads = loads
+        self._redis = redis.Redis.from_url(url)
+        self._redis.ping()
+
+    def load_all(self) -> Dict[str, Any]:
+        """Загрузка всех пользователей из хэша."""
+        raw = self._redis.hgetall(self.HASH_KEY)
+        return {k.decode('utf-8'): self._loads(v) for k, v in raw.items()}
+
+    def save_user(self, key: str, user_data: Dict[str, Any]) -> None:
+        """Точечная запись одного пользователя."""
+        self._redis.hset(self.HASH_KEY, key, self._dumps(user_data))
+
+    def save_all(self, users_data: Dict[str, Any]) -> None:
+        """Запись всех пользователей разом (миграция из JSON файла)."""
+        if users_data:
+            mapping = {k: self._dumps(v) for k, v in users_data.items()}
+            self._redis.hset(self.HASH_KEY, mapping=mapping)
+
+
+class SqliteUserStore:
+    """Данные пользователей в SQLite.
+
+    WAL-журнал, чтобы чтения не блокировались записями; UPSERT по
+    первичному ключу обновляет только строку изменённого пользователя.
+    """
+
+    __slots__ = ('_dumps', '_loads', '_conn')
+
+    def __init__(self, path: str, dumps, loads):
+        """Открытие базы; dumps/loads — (де)сериализаторы JSON."""
+        self._dumps = dumps
+        self._loads = loads
+        # check_same_thread=False: запись уходит в executor из flush_data()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS users (key TEXT PRIMARY KEY, data TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def load_all(self) -> Dict[str, Any]:
+        """Загрузка всех пользователей из таблицы."""
+        rows = self._conn.execute("SELECT key, data FROM users").fetchall()
+        return {key: self._loads(data) for key, data in rows}
+
+    def save_user(self, key: str, user_data: Dict[str, Any]) -> None:
+        """Точечная запись одного пользователя (UPSERT по ключу)."""
+        self._conn.execute(
+            "INSERT INTO users (key, data) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET data = excluded.data",
+            (key, self._dumps(user_data)),
+        )
+        self._conn.commit()
+
+    def save_all(self, users_data: Dict[str, Any]) -> None:
+        """Запись всех пользователей разом (миграция из JSON файла)."""
+        if users_data:
+            self._conn.executemany(
+                "INSERT INTO users (key, data) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET data = excluded.data",
+                [(k, self._dumps(v)) for k, v in users_data.items()],
+            )
+            self._conn.commit()
+
+
+def create_user_store(dumps, loads):
+    """Выбор хранилища пользователей: Redis (REDIS_URL) или SQLite (USER_DB).
+
+    Иначе None — вызывающая сторона остаётся на JSON файле.
+    """
+    url = os.getenv('REDIS_URL')
+    if url:
+        if redis is None:
+            logger.warning("REDIS_URL задан, но пакет redis не установлен — используем JSON файл")
+        else:
+            try:
+                store = RedisUserStore(url, dumps, loads)
+                logger.info("Хранилище пользователей: Redis")
+                return store
+            except Exception as e:
+                logger.error(f"Не удалось подключиться к Redis, используем JSON файл: {e}")
+
+    db_path = os.getenv('USER_DB')
+    if db_path:
+        try:
+            store = SqliteUserStore(db_path, dumps, loads)
+            logger.info(f"Хранилище пользователей: SQLite ({db_path})")
+            return store
+        except Exception as e:
+            logger.error(f"Не удалось открыть SQLite {db_path}, используем JSON файл: {e}")
+
+    return None